@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+"""
+Memoised adjudication.
+
+Every unit on the board gets exactly one order, and each order names
+its unit's type, location and power, so a set of orders describes the
+position it is given in as well. The outcome of a movement phase only
+depends on that set (and the map), not on the order the orders are
+listed in, so it can be reused whenever the same set turns up again,
+as it does all the time when searching or playing out many games from
+the same opening.
+
+    cache = AdjudicationCache(maxsize=100_000)
+    resolution = cache.resolve(orders, board)
+    cache.info()  # CacheInfo(hits, misses, evictions, size, maxsize)
+
+Cached Resolutions are shared between callers and must not be
+modified.
+"""
+import hashlib
+import threading
+
+from collections import OrderedDict
+from typing import NamedTuple
+
+from board_index import standard_board
+from order_types import render_order
+from orders import Resolution, order_resolver
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+def order_set_key(orders, board):
+    """
+    In-memory key of a set of orders on a board, the same whatever
+    order they are listed in.
+    """
+    return board.fingerprint, frozenset(orders)
+
+
+def order_set_hash(orders, board):
+    """
+    Stable sha1 of a set of orders on a board, for keys shared between
+    processes or stored on disk (python's hash() changes per process).
+    """
+    digest = hashlib.sha1(board.fingerprint.encode())
+    for order in sorted(set(orders)):
+        digest.update(f"{order.power}:{render_order(order, board)}\n".encode())
+    return digest.hexdigest()
+
+
+class AdjudicationCache:
+    """
+    Least recently used cache of Resolutions, see the module docstring.
+    """
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._resolutions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._resolutions)
+
+    def resolve(self, order_list, board=None):
+        """
+        Same as orders.order_resolver, reusing earlier adjudications of
+        the same order set. The Resolution lists the orders as given.
+        """
+        orders = tuple(order_list)
+        board = board or standard_board()
+        key = order_set_key(orders, board)
+        with self._lock:
+            cached = self._resolutions.get(key)
+            if cached is not None:
+                self._resolutions.move_to_end(key)
+                self.hits += 1
+        if cached is None:
+            cached = order_resolver(orders, board)
+            with self._lock:
+                self.misses += 1
+                self._resolutions[key] = cached
+                if len(self._resolutions) > self.maxsize:
+                    self._resolutions.popitem(last=False)
+                    self.evictions += 1
+            return cached
+        if cached.orders == orders:
+            return cached
+        return Resolution(orders, tuple(cached.outcome(order) for order in orders),
+                          cached.dislodged, cached.contested)
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         len(self._resolutions), self.maxsize)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._resolutions.clear()
+            self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""
+Benchmark the order resolver on the adjudication corpus.
+
+    python benchmark.py [seconds]
+
+Every case in adjudication_cases.json is checked once, then the
+whole corpus is resolved repeatedly for the given time (default 2s)
+and the throughput is reported in orders resolved per second.
+"""
+import json
+import os
+import sys
+import time
+
+from board_index import standard_board
+from order_types import parse_order
+from orders import order_resolver
+
+CASES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "adjudication_cases.json")
+
+
+def load_cases(path=CASES_FILE):
+    """
+    Returns (name, orders, expected results, expected dislodged
+    locations) for each case of the corpus.
+    """
+    board = standard_board()
+    with open(path, "r") as f:
+        cases = json.load(f)
+    return [(case["name"],
+             tuple(parse_order(text, board, power) for power, text in case["orders"]),
+             tuple(case["results"]),
+             {board.location_ids[name] for name in case["dislodged"]})
+            for case in cases]
+
+
+def check_cases(cases):
+    """
+    Names of the cases the resolver gets wrong.
+    """
+    failures = []
+    for name, orders, results, dislodged in cases:
+        resolution = order_resolver(orders)
+        if resolution.results != results or set(resolution.dislodged) != dislodged:
+            failures.append(name)
+    return failures
+
+
+def run(seconds=2.0):
+    cases = load_cases()
+    failures = check_cases(cases)
+    for name in failures:
+        print(f"FAILED: {name}")
+    corpus = [orders for _, orders, _, _ in cases]
+    n_orders = sum(len(orders) for orders in corpus)
+    rounds = 0
+    start = time.perf_counter()
+    end = start + seconds
+    while time.perf_counter() < end:
+        for orders in corpus:
+            order_resolver(orders)
+        rounds += 1
+    elapsed = time.perf_counter() - start
+    print(f"{len(cases)} cases, {n_orders} orders, {rounds} rounds in {elapsed:.2f}s")
+    print(f"{rounds * len(cases) / elapsed:,.0f} adjudications per second")
+    print(f"{rounds * n_orders / elapsed:,.0f} orders resolved per second")
+    return not failures
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    sys.exit(0 if run(seconds) else 1)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+
+"""
+Compiled, immutable index of the board topology.
+
+The networkx graph is convenient for building and drawing the map but
+every lookup goes through several layers of dicts. The validator and
+resolver only need a handful of facts about the map, so they are
+compiled here once into flat tuples indexed by integer ids:
+
+    province id: position of the province in the sorted province names
+    location id: province ids, followed by one id per split coast
+                 (e.g. "StP_NC", "StP_SC")
+
+A province's own location id is the same as its province id, so
+armies (which never sit on a coast) can use either interchangeably.
+Legal moves are stored as bitsets over location ids (python ints), so
+checking a move is a single shift and mask.
+"""
+import functools
+import hashlib
+import json
+import os
+import weakref
+
+INLAND, WATER, COASTAL, IMPASSIBLE = range(4)
+PROVINCE_TYPES = ("inland", "water", "coastal", "impassible")
+COAST_SUFFIXES = {"north": "_NC", "south": "_SC"}
+# home_power values of provinces that don't belong to a great power
+UNOWNED = ("Neutral", "sea", "none")
+
+
+def iter_bits(mask):
+    """
+    Yield the positions of the set bits of `mask`, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _fingerprint(provinces, borders):
+    """
+    Hash of the map topology, independent of the order provinces and
+    borders are listed in. Two boards with equal fingerprints have the
+    same ids for every province and location.
+    """
+    merged_borders = {}
+    for a, b, attrs in borders:
+        # a border listed twice is one edge, as in networkx
+        merged_borders.setdefault(tuple(sorted((a, b))), {}).update(attrs)
+    canonical = json.dumps(
+        [{name: [provinces[name]["type"], provinces[name]["home_power"],
+                 bool(provinces[name]["supply_centre"]),
+                 bool(provinces[name].get("split_coast"))]
+          for name in provinces},
+         sorted([list(pair), attrs] for pair, attrs in merged_borders.items())],
+        sort_keys=True)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def _edge_coasts(attrs):
+    coast = attrs.get("coast")
+    if coast is None:
+        return ()
+    if isinstance(coast, str):
+        return (coast,)
+    return tuple(coast)
+
+
+class BoardIndex:
+    """
+    Integer indexed view of a map built from `provinces` and
+    `province_borders` as defined in board_data.py.
+    """
+    __slots__ = ("province_names", "province_ids", "province_type",
+                 "location_names", "location_ids", "location_province",
+                 "location_coast", "province_locations", "adjacency",
+                 "land_only", "army_moves", "fleet_moves", "army_reach",
+                 "fleet_reach",
+                 "army_neighbours", "fleet_neighbours", "water_mask",
+                 "coastal_mask", "powers", "supply_centre_mask",
+                 "home_centres", "fingerprint", "__weakref__")
+
+    def __init__(self, provinces, province_borders):
+        borders = []
+        for border in province_borders:
+            attrs = border[2] if len(border) > 2 else {}
+            borders.append((border[0], border[1], attrs))
+
+        province_names = tuple(sorted(provinces))
+        self.fingerprint = _fingerprint(provinces, borders)
+        province_ids = {name: i for i, name in enumerate(province_names)}
+
+        # split coasts are named after the coasts used on their borders
+        split_coasts = {}
+        for name in province_names:
+            if provinces[name].get("split_coast"):
+                split_coasts[name] = set()
+        for from_province, to_province, attrs in borders:
+            for province in (from_province, to_province):
+                if province in split_coasts:
+                    split_coasts[province].update(_edge_coasts(attrs))
+
+        location_names = list(province_names)
+        location_province = list(range(len(province_names)))
+        location_coast = [None] * len(province_names)
+        province_locations = [[i] for i in range(len(province_names))]
+        coast_locations = sorted(
+            (name + COAST_SUFFIXES[coast], name, coast)
+            for name, coasts in split_coasts.items() for coast in coasts)
+        for location_name, province, coast in coast_locations:
+            province_locations[province_ids[province]].append(len(location_names))
+            location_names.append(location_name)
+            location_province.append(province_ids[province])
+            location_coast.append(coast)
+        location_ids = {name: i for i, name in enumerate(location_names)}
+
+        province_type = tuple(
+            PROVINCE_TYPES.index(provinces[name]["type"])
+            for name in province_names)
+
+        n_locations = len(location_names)
+        adjacency = [0] * len(province_names)
+        land_only = [0] * len(province_names)
+        army_moves = [0] * n_locations
+        fleet_moves = [0] * n_locations
+
+        def fleet_locations(province, coasts):
+            if province not in split_coasts:
+                return [province_ids[province]]
+            return [location_ids[province + COAST_SUFFIXES[coast]]
+                    for coast in coasts]
+
+        for from_province, to_province, attrs in borders:
+            a, b = province_ids[from_province], province_ids[to_province]
+            adjacency[a] |= 1 << b
+            adjacency[b] |= 1 << a
+            types = (province_type[a], province_type[b])
+            if IMPASSIBLE in types:
+                continue
+            if WATER not in types:
+                army_moves[a] |= 1 << b
+                army_moves[b] |= 1 << a
+            if attrs.get("land_only"):
+                land_only[a] |= 1 << b
+                land_only[b] |= 1 << a
+            if INLAND in types or attrs.get("land_only"):
+                continue
+            coasts = _edge_coasts(attrs)
+            for from_location in fleet_locations(from_province, coasts):
+                for to_location in fleet_locations(to_province, coasts):
+                    fleet_moves[from_location] |= 1 << to_location
+                    fleet_moves[to_location] |= 1 << from_location
+
+        def reach(moves):
+            # provinces (rather than locations) a unit could move into
+            province_bits = []
+            for location_bits in moves:
+                bits = 0
+                for location in iter_bits(location_bits):
+                    bits |= 1 << location_province[location]
+                province_bits.append(bits)
+            return tuple(province_bits)
+
+        def type_mask(province_type_code):
+            return sum(1 << i for i, code in enumerate(province_type)
+                       if code == province_type_code)
+
+        self.province_names = province_names
+        self.province_ids = province_ids
+        self.province_type = province_type
+        self.location_names = tuple(location_names)
+        self.location_ids = location_ids
+        self.location_province = tuple(location_province)
+        self.location_coast = tuple(location_coast)
+        self.province_locations = tuple(tuple(l) for l in province_locations)
+        self.adjacency = tuple(adjacency)
+        self.land_only = tuple(land_only)
+        self.army_moves = tuple(army_moves)
+        self.fleet_moves = tuple(fleet_moves)
+        self.army_reach = reach(army_moves)
+        self.fleet_reach = reach(fleet_moves)
+        self.army_neighbours = tuple(tuple(iter_bits(m)) for m in army_moves)
+        self.fleet_neighbours = tuple(tuple(iter_bits(m)) for m in fleet_moves)
+        self.water_mask = type_mask(WATER)
+        self.coastal_mask = type_mask(COASTAL)
+        self.powers = tuple(sorted(
+            {provinces[name]["home_power"] for name in province_names} -
+            set(UNOWNED)))
+        self.supply_centre_mask = sum(
+            1 << i for i, name in enumerate(province_names)
+            if provinces[name]["supply_centre"])
+        self.home_centres = {
+            power: sum(1 << i for i, name in enumerate(province_names)
+                       if provinces[name]["home_power"] == power and
+                       provinces[name]["supply_centre"])
+            for power in self.powers}
+
+    @classmethod
+    def from_graph(cls, G):
+        """
+        Compile the index from a map graph such as the one stored in
+        map_state_turn_000.json.
+        """
+        provinces = dict(G.nodes(data=True))
+        borders = [(u, v, attrs) for u, v, attrs in G.edges(data=True)]
+        return cls(provinces, borders)
+
+    def __repr__(self):
+        return (f"BoardIndex({len(self.province_names)} provinces, "
+                f"{len(self.location_names)} locations)")
+
+    def can_move(self, unit_type, from_location, to_location):
+        """
+        Whether a unit of `unit_type` ("A" or "F") may move between
+        two locations.
+        """
+        moves = self.fleet_moves if unit_type == "F" else self.army_moves
+        return moves[from_location] >> to_location & 1 == 1
+
+    def neighbours(self, unit_type, location):
+        """
+        Locations a unit of `unit_type` can move to from `location`.
+        """
+        if unit_type == "F":
+            return self.fleet_neighbours[location]
+        return self.army_neighbours[location]
+
+    def can_reach(self, unit_type, from_location, province):
+        """
+        Whether a unit could move into any location of `province`.
+        Used for supports, which are given to a province, not a coast.
+        """
+        reach = self.fleet_reach if unit_type == "F" else self.army_reach
+        return reach[from_location] >> province & 1 == 1
+
+    def is_adjacent(self, from_province, to_province):
+        return self.adjacency[from_province] >> to_province & 1 == 1
+
+
+STANDARD_MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "map_state_turn_000.json")
+# where compiled data shared between processes is kept (distance
+# tables, compiled variants)
+CACHE_DIR = os.environ.get(
+    "DIPLOMACY_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+_graph_indexes = weakref.WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=None)
+def standard_board():
+    """
+    Index of the standard map, read straight from the node-link data in
+    map_state_turn_000.json so that networkx is not needed.
+    Province names used by units and order strings are resolved
+    against this board.
+    """
+    with open(STANDARD_MAP_FILE, "r") as f:
+        g_data = json.load(f)
+    provinces = {}
+    for node in g_data["nodes"]:
+        attrs = dict(node)
+        provinces[attrs.pop("id")] = attrs
+    borders = []
+    for link in g_data["links"]:
+        attrs = dict(link)
+        borders.append((attrs.pop("source"), attrs.pop("target"), attrs))
+    return BoardIndex(provinces, borders)
+
+
+def index_for_graph(G, board=None):
+    """
+    Return the compiled index for a map graph, compiling it on first use
+    unless an already compiled `board` of the same map is given.
+    Graphs of the standard map share standard_board().
+    """
+    try:
+        return _graph_indexes[G]
+    except KeyError:
+        if board is None:
+            board = BoardIndex.from_graph(G)
+        if board.fingerprint == standard_board().fingerprint:
+            board = standard_board()
+        _graph_indexes[G] = board
+        return board
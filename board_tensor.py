@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+"""
+Array representation of board positions for batch processing.
+
+A position is a (province x feature) array with one row per province
+id of the board index (see board_index.py) and the feature columns
+listed in `feature_names`:
+
+    army, fleet: a unit is in the province
+    unit_<power>: owner of the unit
+    north_coast, south_coast: coast of a fleet in a split coast province
+    supply_centre: the province is a supply centre
+    centre_<power>: owner of the supply centre
+    dislodged_army, ..., dislodged_south_coast: the unit columns again
+        for a dislodged unit, which shares its province with the unit
+        that dislodged it
+
+Many positions stack into a (board x province x feature) array.
+"""
+import numpy as np
+
+from units import Army, Fleet, all_units
+
+# offsets within a block of unit columns
+ARMY, FLEET = 0, 1
+UNIT_OWNER = 2
+
+
+def _unit_names(board):
+    return (["army", "fleet"] +
+            [f"unit_{power}" for power in board.powers] +
+            ["north_coast", "south_coast"])
+
+
+def feature_names(board):
+    return (_unit_names(board) + ["supply_centre"] +
+            [f"centre_{power}" for power in board.powers] +
+            [f"dislodged_{name}" for name in _unit_names(board)])
+
+
+def _columns(board):
+    """
+    (coast, supply_centre, centre_owner, dislodged): coast is the
+    offset of the coast columns in a block of unit columns, dislodged
+    the first column of the dislodged unit's block.
+    """
+    n_powers = len(board.powers)
+    coast = UNIT_OWNER + n_powers
+    supply_centre = coast + 2
+    centre_owner = supply_centre + 1
+    dislodged = centre_owner + n_powers
+    return coast, supply_centre, centre_owner, dislodged
+
+
+def _static_features(board, dtype):
+    rows = np.zeros((len(board.province_names), len(feature_names(board))), dtype)
+    _, supply_centre, _, _ = _columns(board)
+    for province in range(len(board.province_names)):
+        if board.supply_centre_mask >> province & 1:
+            rows[province, supply_centre] = 1
+    return rows
+
+
+def encode_batch(positions, board, dtype=np.uint8):
+    """
+    Encode many positions at once.
+    `positions` is a sequence of (units, centre_owners) where units is
+    an iterable of Unit and centre_owners maps province id -> power.
+    Returns an array of shape (len(positions), provinces, features).
+    """
+    coast_column, _, centre_column, dislodged_column = _columns(board)
+    power_ids = {power: i for i, power in enumerate(board.powers)}
+    location_province = board.location_province
+    location_coast = board.location_coast
+    batch, rows, columns = [], [], []
+    for b, (units, centre_owners) in enumerate(positions):
+        for unit in units:
+            location = unit.location
+            province = location_province[location]
+            block = dislodged_column if unit.dislodged else 0
+            unit_columns = [block + (FLEET if unit.type == "F" else ARMY),
+                            block + UNIT_OWNER + power_ids[unit.home_power]]
+            if location_coast[location] is not None:
+                unit_columns.append(
+                    block + coast_column + (location_coast[location] == "south"))
+            batch += [b] * len(unit_columns)
+            rows += [province] * len(unit_columns)
+            columns += unit_columns
+        for province, power in centre_owners.items():
+            batch.append(b)
+            rows.append(province)
+            columns.append(centre_column + power_ids[power])
+    static = _static_features(board, dtype)
+    out = np.broadcast_to(static, (len(positions),) + static.shape).copy()
+    out[batch, rows, columns] = 1
+    return out
+
+
+def encode_game_states(game_states, dtype=np.uint8):
+    """
+    Stack many GameStates (sharing one board) into a single array.
+    """
+    positions = [(all_units(game_state.units), game_state.centre_owners)
+                 for game_state in game_states]
+    return encode_batch(positions, game_states[0].board, dtype)
+
+
+def encode_game_state(game_state, dtype=None):
+    """
+    (province x feature) array of a GameState
+    """
+    return encode_game_states([game_state], dtype or np.uint8)[0]
+
+
+def decode(tensor, board):
+    """
+    Inverse of encoding a single position.
+    Returns (units, centre_owners) with units as {power: [Unit]}, the
+    layout used by GameState.units.
+    """
+    coast_column, _, centre_column, dislodged_column = _columns(board)
+    n_powers = len(board.powers)
+    units = {power: [] for power in board.powers}
+    for block in (0, dislodged_column):
+        rows = tensor[:, block:block + coast_column + 2]
+        for province in np.flatnonzero(rows[:, ARMY] + rows[:, FLEET]):
+            row = rows[province]
+            power = board.powers[int(np.argmax(row[UNIT_OWNER:UNIT_OWNER + n_powers]))]
+            name = board.province_names[province]
+            if row[FLEET]:
+                coast = None
+                if row[coast_column]:
+                    coast = "north"
+                elif row[coast_column + 1]:
+                    coast = "south"
+                unit = Fleet(power, name, coast=coast, board=board)
+            else:
+                unit = Army(power, name, board=board)
+            unit.dislodged = bool(block)
+            units[power].append(unit)
+    centres = tensor[:, centre_column:centre_column + n_powers]
+    centre_owners = {int(province): board.powers[int(np.argmax(centres[province]))]
+                     for province in np.flatnonzero(centres.any(axis=1))}
+    return units, centre_owners
+
+
+def decode_batch(tensors, board):
+    return [decode(tensor, board) for tensor in tensors]
+
+
+def unit_counts(tensors, board):
+    """
+    Units per power for each position, dislodged ones included, shape
+    (boards, powers).
+    """
+    _, _, _, dislodged_column = _columns(board)
+    n_powers = len(board.powers)
+    owners = slice(UNIT_OWNER, UNIT_OWNER + n_powers)
+    dislodged_owners = slice(dislodged_column + UNIT_OWNER,
+                             dislodged_column + UNIT_OWNER + n_powers)
+    return (tensors[..., owners].sum(axis=-2) +
+            tensors[..., dislodged_owners].sum(axis=-2))
+
+
+def centre_counts(tensors, board):
+    """
+    Supply centres per power for each position, shape (boards, powers).
+    """
+    _, _, centre_column, _ = _columns(board)
+    n_powers = len(board.powers)
+    return tensors[..., centre_column:centre_column + n_powers].sum(axis=-2)
+
+
+def occupied(tensors):
+    """
+    Boolean (boards, provinces) array of provinces held by a unit that
+    isn't dislodged.
+    """
+    return (tensors[..., ARMY] + tensors[..., FLEET]) > 0
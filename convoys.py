@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+"""
+Convoy routes.
+
+An army can be convoyed between two coastal provinces when a chain of
+adjacent fleets at sea touches both. The bodies of water of a board
+never change, so they are found once per board; fleet chains only
+depend on which sea provinces of a body hold fleets, so the chains of
+each body are memoised by that mask. When a fleet moves, only the
+chains of its own body of water are worked out again.
+
+    router = convoy_router(board)
+    fleets = fleets_at_sea(units, board)
+    router.can_convoy(fleets, from_province, to_province)
+    router.destinations(fleets, province)
+    router.route(fleets, from_province, to_province)
+
+Fleets and provinces are bitmasks / ids of the board index.
+"""
+import threading
+
+from board_index import iter_bits
+
+# memoised fleet layouts per body of water before the memo is reset
+MAX_LAYOUTS = 4096
+
+_routers = {}
+_lock = threading.Lock()
+
+
+def fleets_at_sea(units, board):
+    """
+    Bitmask of the sea provinces holding a fleet.
+    """
+    location_province = board.location_province
+    water_mask = board.water_mask
+    fleets = 0
+    for unit in units:
+        if unit.type == "F":
+            fleets |= 1 << location_province[unit.location]
+    return fleets & water_mask
+
+
+def _components(mask, adjacency):
+    # connected components of the provinces in mask
+    components = []
+    while mask:
+        component = frontier = mask & -mask
+        while frontier:
+            low = frontier & -frontier
+            frontier ^= low
+            new = adjacency[low.bit_length() - 1] & mask & ~component
+            component |= new
+            frontier |= new
+        mask &= ~component
+        components.append(component)
+    return components
+
+
+class ConvoyRouter:
+    """
+    Convoy reachability on one board, see the module docstring.
+        water_bodies: bitmask of each connected body of water
+    """
+    __slots__ = ("board", "water_bodies", "_chains")
+
+    def __init__(self, board):
+        self.board = board
+        self.water_bodies = tuple(_components(board.water_mask, board.adjacency))
+        # per body of water: {fleets in the body: ((chain, shore), ...)}
+        self._chains = tuple({} for _ in self.water_bodies)
+
+    def __repr__(self):
+        return f"ConvoyRouter({len(self.water_bodies)} bodies of water)"
+
+    def _body_chains(self, body_index, fleets):
+        memo = self._chains[body_index]
+        chains = memo.get(fleets)
+        if chains is None:
+            adjacency = self.board.adjacency
+            coastal_mask = self.board.coastal_mask
+            chains = []
+            for chain in _components(fleets, adjacency):
+                shore = 0
+                for province in iter_bits(chain):
+                    shore |= adjacency[province]
+                chains.append((chain, shore & coastal_mask))
+            chains = tuple(chains)
+            if len(memo) >= MAX_LAYOUTS:
+                memo.clear()
+            memo[fleets] = chains
+        return chains
+
+    def chains(self, fleets):
+        """
+        Chains of adjacent fleets as (chain, shore) bitmasks, where
+        shore holds the coastal provinces an army could be convoyed
+        from or to along the chain.
+        """
+        chains = ()
+        for body_index, body in enumerate(self.water_bodies):
+            if fleets & body:
+                chains += self._body_chains(body_index, fleets & body)
+        return chains
+
+    def destinations(self, fleets, province):
+        """
+        Provinces an army in `province` could be convoyed to.
+        """
+        reach = 0
+        for _, shore in self.chains(fleets):
+            if shore >> province & 1:
+                reach |= shore
+        return reach & ~(1 << province)
+
+    def army_destinations(self, fleets, armies):
+        """
+        {province: destinations} for every province in the `armies`
+        bitmask, sharing the chain lookup between armies.
+        """
+        chains = self.chains(fleets)
+        out = {}
+        for province in iter_bits(armies):
+            reach = 0
+            for _, shore in chains:
+                if shore >> province & 1:
+                    reach |= shore
+            out[province] = reach & ~(1 << province)
+        return out
+
+    def can_convoy(self, fleets, from_province, to_province):
+        """
+        Whether the fleets connect the two provinces.
+        """
+        if from_province == to_province:
+            return False
+        for _, shore in self.chains(fleets):
+            if shore >> from_province & 1 and shore >> to_province & 1:
+                return True
+        return False
+
+    def chain_of(self, fleets, province):
+        """
+        (chain, shore) of the chain holding the fleet in `province`,
+        None if there is no fleet there.
+        """
+        for chain, shore in self.chains(fleets):
+            if chain >> province & 1:
+                return chain, shore
+        return None
+
+    def route(self, fleets, from_province, to_province):
+        """
+        Fewest fleets (sea province ids, in order) that can convoy an
+        army between two provinces, () if there is no route.
+        """
+        adjacency = self.board.adjacency
+        if not self.can_convoy(fleets, from_province, to_province):
+            return ()
+        previous = {}
+        frontier = []
+        for province in iter_bits(adjacency[from_province] & fleets):
+            previous[province] = None
+            frontier.append(province)
+        while frontier:
+            next_frontier = []
+            for province in frontier:
+                if adjacency[province] >> to_province & 1:
+                    path = []
+                    while province is not None:
+                        path.append(province)
+                        province = previous[province]
+                    return tuple(reversed(path))
+                for neighbour in iter_bits(adjacency[province] & fleets):
+                    if neighbour not in previous:
+                        previous[neighbour] = province
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        return ()
+
+
+def convoy_router(board):
+    """
+    The shared ConvoyRouter of a board.
+    """
+    router = _routers.get(board.fingerprint)
+    if router is None:
+        with _lock:
+            router = _routers.setdefault(board.fingerprint, ConvoyRouter(board))
+    return router
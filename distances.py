@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+"""
+All-pairs move distances of a board.
+
+    tables = distance_tables(board)
+    tables.army[from_province, to_province]
+    tables.fleet[from_location, to_province]
+    tables.convoy[from_province, to_province]
+
+Each table holds the fewest movement phases a lone unit needs to get
+from a province (or, for fleets, a location, so coasts count) into a
+province, UNREACHABLE if it never can:
+
+    army: over land borders
+    fleet: over fleet moves, coast aware
+    convoy: an army that may also be convoyed in one phase between any
+            two coastal provinces on the same body of water (assuming
+            the fleets are there)
+
+Tables are uint8 numpy arrays, built by breadth first search over the
+board index bitsets the first time a board asks for them and saved
+under CACHE_DIR keyed by the board fingerprint, so later processes
+just load them.
+"""
+import os
+import threading
+
+import numpy as np
+
+from board_index import CACHE_DIR, iter_bits
+
+UNREACHABLE = 255
+
+_tables = {}
+_lock = threading.Lock()
+
+
+class DistanceTables:
+    """
+    Distance arrays of one board, see the module docstring.
+    """
+    __slots__ = ("board", "army", "fleet", "convoy")
+
+    def __init__(self, board, army, fleet, convoy):
+        self.board = board
+        self.army = army
+        self.fleet = fleet
+        self.convoy = convoy
+
+    def __repr__(self):
+        return f"DistanceTables({self.board!r})"
+
+    def distance(self, unit_type, location, province, convoy=False):
+        """
+        Moves a unit of `unit_type` at `location` needs to reach
+        `province`. Armies may be convoyed if `convoy` is set.
+        """
+        if unit_type == "F":
+            return int(self.fleet[location, province])
+        table = self.convoy if convoy else self.army
+        return int(table[self.board.location_province[location], province])
+
+
+def _bfs(moves, n_rows, n_columns, to_column):
+    """
+    Distance from each of the first `n_rows` nodes to every column,
+    where `moves` are neighbour bitsets over nodes and `to_column`
+    maps a node to its column (nodes sharing a column take the nearest).
+    """
+    out = np.full((n_rows, n_columns), UNREACHABLE, np.uint8)
+    for source in range(n_rows):
+        row = out[source]
+        seen = frontier = 1 << source
+        distance = 0
+        while frontier:
+            for node in iter_bits(frontier):
+                column = to_column[node]
+                if row[column] > distance:
+                    row[column] = distance
+            reached = 0
+            for node in iter_bits(frontier):
+                reached |= moves[node]
+            frontier = reached & ~seen
+            seen |= frontier
+            distance += 1
+    return out
+
+
+def _convoy_moves(board):
+    # army moves plus one convoy hop around each body of water
+    n_provinces = len(board.province_names)
+    convoy_moves = list(board.army_moves[:n_provinces])
+    water_left = board.water_mask
+    while water_left:
+        body = water_left & -water_left
+        frontier = body
+        while frontier:
+            reached = 0
+            for province in iter_bits(frontier):
+                reached |= board.adjacency[province]
+            frontier = reached & water_left & ~body
+            body |= frontier
+        water_left &= ~body
+        shore = 0
+        for province in iter_bits(body):
+            shore |= board.adjacency[province]
+        shore &= board.coastal_mask
+        for province in iter_bits(shore):
+            convoy_moves[province] |= shore & ~(1 << province)
+    return convoy_moves
+
+
+def compute_tables(board):
+    """
+    Build the distance tables of a board (no caching).
+    """
+    n_provinces = len(board.province_names)
+    n_locations = len(board.location_names)
+    provinces = range(n_provinces)
+    army = _bfs(board.army_moves[:n_provinces], n_provinces, n_provinces, provinces)
+    fleet = _bfs(board.fleet_moves, n_locations, n_provinces,
+                 board.location_province)
+    convoy = _bfs(_convoy_moves(board), n_provinces, n_provinces, provinces)
+    return DistanceTables(board, army, fleet, convoy)
+
+
+def cache_file(board, directory=None):
+    return os.path.join(directory or CACHE_DIR,
+                        f"distances_{board.fingerprint}.npz")
+
+
+def _load(board, path):
+    with np.load(path) as data:
+        tables = DistanceTables(board, data["army"], data["fleet"], data["convoy"])
+    n_provinces = len(board.province_names)
+    if (tables.army.shape != (n_provinces, n_provinces) or
+        tables.fleet.shape != (len(board.location_names), n_provinces)):
+        raise ValueError(f"{path} doesn't match the board")
+    return tables
+
+
+def _save(tables, path):
+    # write then rename, so readers never see half a file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, army=tables.army, fleet=tables.fleet, convoy=tables.convoy)
+    os.replace(temp_path, path)
+
+
+def distance_tables(board, directory=None):
+    """
+    DistanceTables of a board: from memory, else from the on-disk
+    cache, else computed (and saved for next time).
+    """
+    tables = _tables.get(board.fingerprint)
+    if tables is not None:
+        return tables
+    with _lock:
+        tables = _tables.get(board.fingerprint)
+        if tables is not None:
+            return tables
+        path = cache_file(board, directory)
+        try:
+            tables = _load(board, path)
+        except (OSError, ValueError, KeyError):
+            tables = compute_tables(board)
+            try:
+                _save(tables, path)
+            except OSError:
+                # read-only install, keep the tables in memory only
+                pass
+        _tables[board.fingerprint] = tables
+    return tables
+
+
+def clear_cache():
+    with _lock:
+        _tables.clear()
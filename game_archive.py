@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+
+"""
+Single file, append-only binary archive of a game's turns.
+
+Layout (little endian):
+
+    header:  magic "DIPA", format version, map fingerprint (sha1),
+             map variant name, number of unit slots and centres
+    records: one fixed-size record per turn
+        turn number (uint32)
+        year (uint16), phase (uint8, see phases.Phase)
+        number of units (uint8)
+        unit slots: (location id, code) byte pairs, where code holds
+            the unit type (bit 0: fleet), dislodged flag (bit 1) and
+            power index + 1 (bits 2-7)
+        centre owners: one byte per supply centre (province id order),
+            0 for unowned, else power index + 1
+        pending retreats: one byte per unit slot, the province the
+            unit can't retreat to because its attacker came from there
+            (255 for none), then a province bitmask every retreating
+            unit is kept out of (the provinces left empty by standoffs)
+
+Since every record has the same size, turn n is found by arithmetic
+on the memory-mapped file. A game can't have more units than supply
+centres, which sizes the unit slots. Orders are variable length and
+stay in the turn files (turn_files.py).
+"""
+import mmap
+import os
+import struct
+
+from board_index import iter_bits
+from map_cache import load_map
+from phases import RETREAT_PHASES, Phase
+from units import all_units, unit_from_ids
+
+MAGIC = b"DIPA"
+VERSION = 2
+NO_ATTACKER = 255
+HEADER = struct.Struct("<4sH20s32sHH")
+
+
+class ArchivedTurn:
+    """
+    One turn read back from an archive.
+        turn: turn number
+        units: {power: [Unit]}
+        centre_owners: {province id: power}
+        year, phase: when the position stands
+        retreats: {location: bitmask of provinces it can't retreat to},
+            as GameState.retreats
+    """
+    __slots__ = ("turn", "units", "centre_owners", "year", "phase", "retreats")
+
+    def __init__(self, turn, units, centre_owners, year=1901,
+                 phase=Phase.SPRING_MOVEMENT, retreats=None):
+        self.turn = turn
+        self.units = units
+        self.centre_owners = centre_owners
+        self.year = year
+        self.phase = phase
+        self.retreats = retreats or {}
+
+    def __repr__(self):
+        return f"ArchivedTurn({self.turn})"
+
+
+class GameArchive:
+    """
+    Archive file of one game, see the module docstring for the layout.
+    Opening an existing file checks that it was written for the same
+    map; a missing file is created.
+
+        with GameArchive("game_7.dipa") as archive:
+            archive.append(game_state)
+            archive.turn(3).units
+            for turn in archive: ...
+    """
+
+    def __init__(self, path, variant="standard"):
+        self.path = path
+        self.variant = variant
+        _, self.board = load_map(variant)
+        board = self.board
+        self._powers = board.powers
+        self._power_ids = {power: i + 1 for i, power in enumerate(board.powers)}
+        self._centres = tuple(iter_bits(board.supply_centre_mask))
+        self._max_units = len(self._centres)
+        self._mask_bytes = (len(board.province_names) + 7) // 8
+        self._record = struct.Struct(
+            f"<IHBB{2 * self._max_units}s{len(self._centres)}s"
+            f"{self._max_units}s{self._mask_bytes}s")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION,
+                                    bytes.fromhex(board.fingerprint),
+                                    variant.encode(), self._max_units,
+                                    len(self._centres)))
+        self._file = open(path, "r+b")
+        magic, version, fingerprint, _, max_units, n_centres = HEADER.unpack(
+            self._file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a game archive")
+        if version != VERSION:
+            raise ValueError(f"{path} is archive format {version}, "
+                             f"not {VERSION}")
+        if (fingerprint.hex() != board.fingerprint or
+            (max_units, n_centres) != (self._max_units, len(self._centres))):
+            raise ValueError(f"{path} was written for a different {variant!r} map")
+        self._map = None
+        self._mapped_records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __len__(self):
+        return (os.fstat(self._file.fileno()).st_size - HEADER.size) // self._record.size
+
+    def append(self, game_state):
+        """
+        Add the position of a GameState as the next record.
+        """
+        units = all_units(game_state.units)
+        if len(units) > self._max_units:
+            raise ValueError(f"Can't archive more than {self._max_units} units")
+        slots = bytearray(2 * self._max_units)
+        for i, unit in enumerate(units):
+            slots[2 * i] = unit.location
+            slots[2 * i + 1] = ((unit.type == "F") | unit.dislodged << 1 |
+                                self._power_ids[unit.home_power] << 2)
+        centre_owners = game_state.centre_owners
+        centres = bytes(self._power_ids.get(centre_owners.get(province), 0)
+                        for province in self._centres)
+        attackers, shared = self._encode_retreats(units, game_state.retreats)
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(self._record.pack(
+            game_state.turn, game_state.year, game_state.phase, len(units),
+            bytes(slots), centres, attackers,
+            shared.to_bytes(self._mask_bytes, "little")))
+        self._file.flush()
+
+    def _encode_retreats(self, units, retreats):
+        # each unit's restriction is the shared mask plus at most one
+        # province of its own, as phases.retreat_restrictions makes them
+        attackers = bytearray([NO_ATTACKER] * self._max_units)
+        if not retreats:
+            return bytes(attackers), 0
+        shared = -1
+        for blocked in retreats.values():
+            shared &= blocked
+        if len(retreats) == 1:
+            # a lone unit's restriction is all shared
+            shared = next(iter(retreats.values()))
+        for i, unit in enumerate(units):
+            if unit.location not in retreats:
+                continue
+            own = retreats[unit.location] & ~shared
+            if own & (own - 1):
+                raise ValueError("Can't archive retreats blocked by more than "
+                                 "one province per unit besides standoffs")
+            if own:
+                attackers[i] = own.bit_length() - 1
+        return bytes(attackers), shared
+
+    def _mapped(self, index):
+        if index >= self._mapped_records:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_records = (len(self._map) - HEADER.size) // self._record.size
+        return self._map
+
+    def _decode(self, index):
+        buffer = self._mapped(index)
+        (turn, year, phase, n_units, slots, centres, attackers,
+         shared) = self._record.unpack_from(
+            buffer, HEADER.size + index * self._record.size)
+        shared = int.from_bytes(shared, "little")
+        units = {power: [] for power in self._powers}
+        retreats = {}
+        for i in range(n_units):
+            location, code = slots[2 * i], slots[2 * i + 1]
+            power = self._powers[(code >> 2) - 1]
+            unit = unit_from_ids("F" if code & 1 else "A", power, location,
+                                 self.board)
+            unit.dislodged = bool(code & 2)
+            units[power].append(unit)
+            if unit.dislodged and phase in RETREAT_PHASES:
+                retreats[location] = shared
+                if attackers[i] != NO_ATTACKER:
+                    retreats[location] |= 1 << attackers[i]
+        centre_owners = {province: self._powers[owner - 1]
+                         for province, owner in zip(self._centres, centres)
+                         if owner}
+        return ArchivedTurn(turn, units, centre_owners, year, Phase(phase),
+                            retreats)
+
+    def __getitem__(self, index):
+        n_records = len(self)
+        if index < 0:
+            index += n_records
+        if not 0 <= index < n_records:
+            raise IndexError(index)
+        return self._decode(index)
+
+    def turn(self, turn):
+        """
+        Record of a given turn number. Turns are normally archived one
+        after another, so this is a single seek; gaps fall back to a
+        binary search.
+        """
+        n_records = len(self)
+        if n_records == 0:
+            raise KeyError(turn)
+        first = self._turn_at(0)
+        index = turn - first
+        if 0 <= index < n_records and self._turn_at(index) == turn:
+            return self._decode(index)
+        low, high = 0, n_records
+        while low < high:
+            middle = (low + high) // 2
+            if self._turn_at(middle) < turn:
+                low = middle + 1
+            else:
+                high = middle
+        if low < n_records and self._turn_at(low) == turn:
+            return self._decode(low)
+        raise KeyError(turn)
+
+    def _turn_at(self, index):
+        return struct.unpack_from("<I", self._mapped(index),
+                                  HEADER.size + index * self._record.size)[0]
+
+    def __iter__(self):
+        """
+        Stream the archived turns in order.
+        """
+        for index in range(len(self)):
+            yield self._decode(index)
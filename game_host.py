@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+
+"""
+Hosting many live games in one asyncio process.
+
+    host = GameHost(deadline=24 * 3600)
+    host.create_game(7)
+    reasons = await host.submit(7, "France", ["A Par-Bur", "F Bre-Mid"])
+    await host.submit(7, "Germany", [...], ready=True)
+    game_state = await host.next_phase(7)
+
+Games are kept in memory. Each has an asyncio.Lock, so submissions
+to one game are applied one at a time while other games carry on.
+Orders are checked as they come in with an OrderSession (movement
+phases) or against the phase's options (retreats and adjustments),
+which costs a few dict lookups per order, so submitting never waits
+on adjudication. A phase is processed once every power with something
+to order has submitted with ready=True, or when its deadline passes,
+whichever comes first. Illegal movement orders and units without
+orders hold.
+
+Adjudication is the only heavy step and runs in an executor, by
+default a process pool whose workers load the map once (as in
+simulation.py) and keep an AdjudicationCache. Retreats and
+adjustments are quick and done on the event loop. If adjudication
+raises, next_phase() raises the same exception and the phase stays
+open.
+"""
+import asyncio
+
+from concurrent.futures import ProcessPoolExecutor
+
+from adjudication_cache import AdjudicationCache
+from board_index import standard_board
+from game_state import GameState
+from map_cache import load_map
+from order_types import HOLD, Order, parse_order
+from order_session import OrderSession
+from orders import Reason
+from phases import MOVEMENT_PHASES
+
+_worker_cache = None
+
+
+def _init_worker():
+    global _worker_cache
+    standard_board()
+    load_map()
+    _worker_cache = AdjudicationCache(10_000)
+
+
+def _adjudicate(orders, variant):
+    # runs in a worker
+    if _worker_cache is None:
+        _init_worker()
+    return _worker_cache.resolve(orders, load_map(variant)[1])
+
+
+class HostedGame:
+    """
+    A game being played on a GameHost and the orders of its current
+    phase.
+        ready: powers that are done ordering
+        waiting: powers that still have to order
+    """
+
+    def __init__(self, game_state, deadline=None):
+        self.game_state = game_state
+        self.deadline = deadline
+        self.lock = asyncio.Lock()
+        self.finished = False
+        self.ready = set()
+        self.waiting = set()
+        self._session = None
+        self._options = frozenset()
+        self._orders = {}
+        self._timer = None
+        self._processed = None
+
+    @property
+    def game_id(self):
+        return self.game_state.game_id
+
+    def _start_phase(self):
+        game_state = self.game_state
+        self.ready = set()
+        self._orders = {}
+        if game_state.phase in MOVEMENT_PHASES:
+            self._session = OrderSession(game_state)
+            self._options = frozenset()
+            self.waiting = {power for power, units in game_state.units.items()
+                            if units}
+        else:
+            self._session = None
+            options = game_state.legal_orders()
+            self._options = frozenset(order for orders in options.values()
+                                      for order in orders)
+            self.waiting = {orders[0].power for orders in options.values()}
+        self._processed = asyncio.get_running_loop().create_future()
+
+    def _order(self, power, order):
+        """
+        Record one order of `power`, returns its Reason.
+        """
+        board = self.game_state.board
+        try:
+            if isinstance(order, str):
+                order = parse_order(order, board, power)
+        except ValueError:
+            return Reason.UNKNOWN_ORDER
+        order = order._replace(power=power)
+        if self._session is not None:
+            unit = self._session.unit(order.location)
+            if unit is None or unit.home_power != power:
+                return Reason.UNKNOWN_ORDER
+            self._session.set_order(order)
+            return self._session.reason(order.location)
+        if order not in self._options:
+            return Reason.UNKNOWN_ORDER
+        self._orders[order.location] = order
+        return Reason.VALID
+
+    def orders(self):
+        """
+        The orders the phase will be processed with.
+        """
+        if self._session is None:
+            return list(self._orders.values())
+        orders = []
+        for order in self._session.orders():
+            if not self._session.is_valid(order.location):
+                order = Order(HOLD, order.unit_type, order.location,
+                              power=order.power)
+            orders.append(order)
+        return orders
+
+
+class GameHost:
+    """
+    Games hosted by one event loop, see the module docstring.
+    `deadline` is the default number of seconds each phase stays open
+    (None waits for every power). `executor` runs adjudication, a
+    process pool is started when the first phase needs one.
+    """
+
+    def __init__(self, deadline=None, executor=None):
+        self.deadline = deadline
+        self.games = {}
+        self._executor = executor
+        self._own_executor = executor is None
+        # processing started by deadlines, referenced until done
+        self._tasks = set()
+
+    def __len__(self):
+        return len(self.games)
+
+    def _game(self, game_id):
+        try:
+            return self.games[game_id]
+        except KeyError:
+            raise KeyError(f"No game {game_id!r}") from None
+
+    def create_game(self, game_id, variant="standard", deadline=None):
+        """
+        Start hosting a new game, must be called on the event loop.
+        """
+        if game_id in self.games:
+            raise ValueError(f"Game {game_id!r} already exists")
+        game = HostedGame(GameState(game_id, 0, variant=variant),
+                          deadline if deadline is not None else self.deadline)
+        self.games[game_id] = game
+        self._open_phase(game)
+        return game
+
+    def game_state(self, game_id):
+        """
+        The current position of a game, not to be modified.
+        """
+        return self._game(game_id).game_state
+
+    def _spawn_process(self, game, turn):
+        task = asyncio.get_running_loop().create_task(self._process(game, turn))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _open_phase(self, game):
+        game._start_phase()
+        turn = game.game_state.turn
+        if not game.waiting:
+            # e.g. builds without a free home centre, nothing to wait for
+            self._spawn_process(game, turn)
+        elif game.deadline is not None:
+            game._timer = asyncio.get_running_loop().call_later(
+                game.deadline, self._spawn_process, game, turn)
+
+    async def submit(self, game_id, power, orders, ready=False):
+        """
+        Add or replace orders of `power` (Order records or text) in the
+        current phase of a game. With `ready`, the power is done; the
+        phase is processed once no power is waiting.
+        Returns {order: Reason} for the orders given, Reason.UNKNOWN_ORDER
+        for orders that don't parse or aren't one of the power's
+        options.
+        """
+        game = self._game(game_id)
+        async with game.lock:
+            if game.finished:
+                raise ValueError(f"Game {game_id!r} is over")
+            reasons = {order: game._order(power, order) for order in orders}
+            if ready:
+                game.ready.add(power)
+                game.waiting.discard(power)
+            turn = game.game_state.turn
+        if ready and not game.waiting:
+            await self._process(game, turn)
+        return reasons
+
+    async def next_phase(self, game_id):
+        """
+        Wait until the current phase of a game is processed and return
+        its GameState. Raises the exception of a failed adjudication.
+        """
+        game = self._game(game_id)
+        await asyncio.shield(game._processed)
+        return game.game_state
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(initializer=_init_worker)
+        return self._executor
+
+    async def _process(self, game, turn):
+        async with game.lock:
+            game_state = game.game_state
+            # a deadline of a phase that was already processed
+            if game.finished or game_state.turn != turn:
+                return
+            if game._timer is not None:
+                game._timer.cancel()
+                game._timer = None
+            orders = game.orders()
+            resolution = None
+            if game_state.phase in MOVEMENT_PHASES:
+                loop = asyncio.get_running_loop()
+                try:
+                    resolution = await loop.run_in_executor(
+                        self._pool(), _adjudicate, tuple(orders),
+                        game_state.variant)
+                except Exception as e:
+                    self._failed(game, e)
+                    return
+            game_state.process(orders, resolution)
+            game_state.turn += 1
+            processed = game._processed
+            if game_state.phase in MOVEMENT_PHASES and game_state.winner():
+                game.finished = True
+            else:
+                self._open_phase(game)
+            processed.set_result(game_state)
+
+    def _failed(self, game, exception):
+        """
+        Adjudication raised: waiters of next_phase get the exception
+        and the phase stays open, to be processed again when a power
+        is ready or the deadline passes.
+        """
+        processed = game._processed
+        loop = asyncio.get_running_loop()
+        game._processed = loop.create_future()
+        processed.set_exception(exception)
+        if game.deadline is not None:
+            game._timer = loop.call_later(game.deadline, self._spawn_process,
+                                          game, game.game_state.turn)
+
+    def remove_game(self, game_id):
+        game = self.games.pop(game_id)
+        if game._timer is not None:
+            game._timer.cancel()
+        game.finished = True
+        return game.game_state
+
+    async def close(self):
+        """
+        Stop every game's timers and the executor if the host started it.
+        """
+        for game_id in list(self.games):
+            self.remove_game(game_id)
+        for task in list(self._tasks):
+            task.cancel()
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
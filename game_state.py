@@ -1,84 +1,358 @@
 #!/usr/bin/env python
 
-import json
+from types import MappingProxyType
 
-import networkx as nx
+from board_index import index_for_graph, iter_bits
+from map_cache import load_map
+from order_types import HOLD, Order, OrderKind
+from orders import legal_orders, order_resolver
+from phases import (MOVEMENT_PHASES, RETREAT_PHASES, Phase, adjustment_counts,
+                    adjustment_options, centre_masks, centre_masks_after_fall,
+                    centre_owners_from_masks, resolve_adjustments,
+                    resolve_retreats, retreat_options, retreat_restrictions,
+                    victory_centres)
+from storage import FileStorage
+from units import all_units
+from variants import load_variant
+from zobrist import zobrist_keys
 
-from orders import order_resolver
-from units import Army, Fleet, unit_from_gamestate
+def home_centre_owners(board):
+    """
+    Supply centre ownership at the start of a game.
+    """
+    return {province: power for power, centres in board.home_centres.items()
+            for province in iter_bits(centres)}
 
 class GameState:
-    def __init__(self, game_id, turn) -> None:
+    def __init__(self, game_id, turn, directory=".", variant="standard",
+                 storage=None) -> None:
         self.game_id = game_id
         self.turn = turn
-        self.G, self.units = self.get_map_state()
+        # where turns are read from and saved to, see storage.py
+        self.storage = storage if storage is not None else FileStorage(directory)
+        # map variant of a new game, later turns use the saved one
+        self.variant = variant
+        self.year = 1901
+        self.phase = Phase.SPRING_MOVEMENT
+        # dislodged unit location -> bitmask of provinces it can't retreat to
+        self.retreats = {}
+        self.G, self.units, centre_owners = self.get_map_state()
+        self.board = index_for_graph(self.G)
+        if centre_owners is None:
+            centre_owners = home_centre_owners(self.board)
+        # power -> bitmask of the supply centres it owns
+        self.centre_masks = centre_masks(centre_owners, self.board)
+        self._centre_owners = None
+        # powers whose unit lists are not shared with a clone
+        self._owned_powers = set(self.units)
+        # 64-bit position hash, kept up to date as the position changes
+        self._keys = zobrist_keys(self.board)
+        self.zobrist = self._keys.position(
+            all_units(self.units),
+            self.centre_owners)
+
+    @property
+    def centre_owners(self):
+        """
+        Supply centre province id -> owning power, built from
+        centre_masks when asked for. Read-only, centres change hands
+        through set_centre_owner / set_centre_masks so that the masks
+        and the hash stay in step.
+        """
+        if self._centre_owners is None:
+            self._centre_owners = MappingProxyType(
+                centre_owners_from_masks(self.centre_masks))
+        return self._centre_owners
+
+    def centre_count(self, power):
+        return self.centre_masks.get(power, 0).bit_count()
+
+    def winner(self):
+        """
+        The power owning more than half of the supply centres, if any.
+        """
+        needed = victory_centres(self.board)
+        for power, mask in self.centre_masks.items():
+            if mask.bit_count() >= needed:
+                return power
+        return None
 
     def get_map_state(self):
+        # the topology is shared by every game, see map_cache.py
         if self.turn == 0:
-            with open("map_state_turn_000.json", "r") as f:
-                g_data = json.load(f)
-            G = nx.node_link_graph(g_data)
-            available_units = {
-                "Austria":
-                    [Army("Austria", "Vie"),
-                    Army("Austria", "Bud"),
-                    Fleet("Austria", "Tri")],
-                "England": 
-                    [Fleet("England", "Lon"),
-                    Fleet("England", "Edi"),
-                    Army("England", "Liv")],
-                "France":
-                    [Army("France", "Par"),
-                    Army("France", "Mar"),
-                    Fleet("France", "Bre")],
-                "Germany":
-                    [Army("Germany", "Ber"),
-                    Army("Germany", "Mun"),
-                    Fleet("Germany", "Kie")],
-                "Italy":
-                    [Army("Italy", "Rom"),
-                    Army("Italy", "Ven"),
-                    Fleet("Italy", "Nap")],
-                "Russia":
-                    [Army("Russia", "Mos"),
-                    Fleet("Russia", "Sev"),
-                    Army("Russia", "War"),
-                    Fleet("Russia", "StP", coast="south")],
-                "Turkey":
-                    [Fleet("Turkey", "Ankara"),
-                    Army("Turkey", "Con"),
-                    Army("Turkey", "Smy"),]
-            }
-            return G, available_units
+            G, _ = load_map(self.variant)
+            # starting units come with the variant, see variants.py
+            return G, load_variant(self.variant).initial_units(), None
+        else:
+            record = self.storage.read(self.game_id, self.turn - 1)
+            self.variant = record.variant
+            self.year, self.phase = record.year, record.phase
+            self.retreats = record.retreats
+            G, _ = load_map(record.variant)
+            return G, record.units, record.centre_owners
+
+    def save(self, orders=()):
+        """
+        Save the position at the end of this turn (after `orders` were
+        applied), GameState(game_id, turn + 1) starts from it.
+        Only units, centre ownership and orders are written, see
+        turn_files.py. Saves go to the game's storage.
+        """
+        return self.storage.write(self.game_id, self.turn, self.units,
+                                  self.centre_owners, orders, self.board,
+                                  self.variant, self.year, self.phase,
+                                  self.retreats)
+
+    def legal_orders(self, power=None):
+        """
+        Every legal order of the current phase for each unit of `power`
+        (or of every power). In adjustment phases builds are listed by
+        home centre instead.
+        Returns {location id: tuple of orders}, see orders.legal_orders
+        and phases.py
+        """
+        if self.phase == Phase.WINTER_ADJUSTMENTS:
+            return adjustment_options(self.units, self.centre_masks,
+                                      self.board, power)
+        units = all_units(self.units)
+        if self.phase in RETREAT_PHASES:
+            return retreat_options(units, self.retreats, self.board, power)
+        return legal_orders(units, self.board, power)
+
+    def process(self, orders, resolution=None):
+        """
+        Carry out the orders of the current phase and move on to the
+        next phase (see phases.py). Movement orders are assumed to be
+        legal, units without one hold; illegal retreat and adjustment
+        orders are ignored.
+        A movement phase's `resolution` may be given if the orders
+        were already adjudicated elsewhere.
+        Returns the Resolution in movement phases, None otherwise.
+        """
+        if self.phase in MOVEMENT_PHASES:
+            if resolution is None:
+                resolution = order_resolver(self._with_holds(orders),
+                                            self.board)
+            self.apply(resolution)
+            self.retreats = retreat_restrictions(resolution)
+            if self.retreats:
+                self.phase = Phase(self.phase + 1)
+            else:
+                self._end_season()
+            return resolution
+        if self.phase in RETREAT_PHASES:
+            allowed = {order for options in self.legal_orders().values()
+                       for order in options}
+            outcome = resolve_retreats(
+                [order for order in orders if order in allowed], self.board)
+            for power, units in self.units.items():
+                if not any(unit.dislodged for unit in units):
+                    continue
+                kept = []
+                for unit in units:
+                    if unit.dislodged:
+                        self.zobrist ^= self._keys.unit(unit)
+                        target = outcome.get(unit.location, -1)
+                        if target < 0:
+                            continue
+                        unit = unit.copy(target, False)
+                        self.zobrist ^= self._keys.unit(unit)
+                    kept.append(unit)
+                self.units[power] = kept
+                self._owned_powers.add(power)
+            self.retreats = {}
+            self._end_season()
+            return None
+        built, disbanded = resolve_adjustments(self.units, self.centre_masks,
+                                               orders, self.board)
+        for unit in disbanded:
+            power = unit.home_power
+            self._own_units(power).remove(unit)
+            self.zobrist ^= self._keys.unit(unit)
+        for unit in built:
+            self.units.setdefault(unit.home_power, [])
+            self._own_units(unit.home_power).append(unit)
+            self.zobrist ^= self._keys.unit(unit)
+        self.year += 1
+        self.phase = Phase.SPRING_MOVEMENT
+        return None
+
+    def _with_holds(self, orders):
+        # the resolver needs an order for every unit
+        location_province = self.board.location_province
+        orders = list(orders)
+        ordered = {location_province[order.location] for order in orders}
+        for power, units in self.units.items():
+            for unit in units:
+                if location_province[unit.location] not in ordered:
+                    orders.append(Order(HOLD, unit.type, unit.location,
+                                        power=power))
+        return orders
+
+    def _end_season(self):
+        if self.phase < Phase.FALL_MOVEMENT:
+            self.phase = Phase.FALL_MOVEMENT
+            return
+        self.set_centre_masks(centre_masks_after_fall(
+            all_units(self.units),
+            self.centre_masks, self.board))
+        counts = adjustment_counts(self.units, self.centre_masks, self.board)
+        if any(counts.values()):
+            self.phase = Phase.WINTER_ADJUSTMENTS
         else:
-            with open(f"game_id_{self.game_id}_game_state_turn_"+f"{self.turn-1}".zfill(3)+".json", "r") as f:
-                gamestate_data = json.load(f)
-            g_data = gamestate_data["game_map"]
-            G = nx.node_link_graph(g_data)
-            unit_dict = gamestate_data["units"]
-            available_units = {
-                "Austria": [],
-                "England": [],
-                "France": [],
-                "Germany": [],
-                "Russia": [],
-                "Turkey": [],
-            }
-            for unit_desc in unit_dict:
-                unit = unit_from_gamestate(unit_desc)
-                available_units[unit.home_power].append(unit)
-            return G, available_units
+            self.year += 1
+            self.phase = Phase.SPRING_MOVEMENT
+
+    def clone(self):
+        """
+        New position sharing the map, and the units until either
+        position changes them. Unit objects are never modified in place
+        (see apply), so only a changed power's list is ever copied.
+        """
+        clone = GameState.__new__(GameState)
+        clone.__dict__.update(self.__dict__)
+        clone.units = dict(self.units)
+        clone._owned_powers = set()
+        self._owned_powers = set()
+        return clone
+
+    def _own_units(self, power):
+        if power not in self._owned_powers:
+            self.units[power] = list(self.units[power])
+            self._owned_powers.add(power)
+        return self.units[power]
+
+    def _unit_indices(self):
+        # location -> (power, index), taken before any unit moves so a
+        # unit moving into a vacated location isn't found again
+        return {unit.location: (power, index)
+                for power, units in self.units.items()
+                for index, unit in enumerate(units)}
+
+    def _find_unit(self, order, indices):
+        found = indices.get(order.location)
+        if found is None or order.power not in ("", found[0]):
+            raise KeyError(f"No unit for order {order}")
+        return found
+
+    def apply(self, resolution):
+        """
+        Update positions from an order_resolver Resolution: successful
+        moves are carried out and dislodged units are flagged.
+        Returns the changes, which undo() reverts.
+        """
+        changes = []
+        dislodged = resolution.dislodged
+        indices = self._unit_indices()
+        for order, succeeded in resolution:
+            if succeeded and order.kind == OrderKind.MOVE:
+                location, is_dislodged = order.target, None
+            elif order.location in dislodged:
+                location, is_dislodged = None, True
+            else:
+                continue
+            power, index = self._find_unit(order, indices)
+            units = self._own_units(power)
+            unit = units[index]
+            changes.append((power, index, unit))
+            units[index] = unit.copy(location, is_dislodged)
+            self.zobrist ^= self._keys.unit(unit) ^ self._keys.unit(units[index])
+        return changes
+
+    def undo(self, changes):
+        """
+        Revert the changes returned by apply().
+        """
+        for power, index, unit in reversed(changes):
+            units = self._own_units(power)
+            self.zobrist ^= self._keys.unit(units[index]) ^ self._keys.unit(unit)
+            units[index] = unit
+
+    def disband_dislodged(self):
+        """
+        Remove dislodged units, returns them.
+        """
+        removed = []
+        for power, units in self.units.items():
+            if any(unit.dislodged for unit in units):
+                removed += [unit for unit in units if unit.dislodged]
+                self.units[power] = [unit for unit in units if not unit.dislodged]
+                self._owned_powers.add(power)
+        for unit in removed:
+            self.zobrist ^= self._keys.unit(unit)
+        return removed
+
+    def set_centre_owner(self, province, power):
+        """
+        Change the owner of a supply centre (None for unowned).
+        Returns the previous owner.
+        """
+        previous = self.centre_owners.get(province)
+        masks = dict(self.centre_masks)
+        if previous is not None:
+            masks[previous] &= ~(1 << province)
+        if power is not None:
+            masks[power] = masks.get(power, 0) | 1 << province
+        self.set_centre_masks(masks)
+        return previous
+
+    def set_centre_masks(self, masks):
+        """
+        Replace the centre masks all at once (e.g. after the fall, see
+        phases.centre_masks_after_fall), updating the hash for the
+        centres that changed hands.
+        """
+        keys = self._keys
+        for power in set(masks) | set(self.centre_masks):
+            old = self.centre_masks.get(power, 0)
+            new = masks.get(power, 0)
+            for province in iter_bits(old & ~new):
+                self.zobrist ^= keys.centre(province, power)
+            for province in iter_bits(new & ~old):
+                self.zobrist ^= keys.centre(province, power)
+        # a new dict, clones may still share the old one
+        self.centre_masks = dict(masks)
+        self._centre_owners = None
+
+    def to_tensor(self, dtype=None):
+        """
+        Province x feature array of this position, see board_tensor.py
+        """
+        import board_tensor
+        return board_tensor.encode_game_state(self, dtype)
+
+    def distances(self):
+        """
+        Move distance tables of this board, see distances.py
+        """
+        import distances
+        return distances.distance_tables(self.board)
 
 class GameStateFromInputs:
-    def __init__(self, G, units_list):
+    def __init__(self, G, units_list, centre_owners=None):
         self.G = G
+        self.board = index_for_graph(G)
         self.units = units_list
+        self.centre_owners = {} if centre_owners is None else centre_owners
+        self.centre_masks = centre_masks(self.centre_owners, self.board)
 
 
-def get_orders(units):
-    pass
+def get_orders(game_state, powers=None, max_nodes=200, seconds=None):
+    """
+    Orders of every unit of `powers` (all powers if None), chosen by
+    searching each power's orders against the others holding, see
+    search.py. The budget is per power.
+    """
+    from search import search_orders
+    orders = []
+    for power in powers or game_state.units:
+        orders += search_orders(game_state, power, max_nodes, seconds).orders
+    return orders
 
 if __name__ == "__main__":
     initial_game_state = GameState(0,0)
-    order_list = get_orders(initial_game_state.units)
-    new_positions = order_resolver(order_list)
+    order_list = get_orders(initial_game_state)
+    new_positions = order_resolver(order_list, initial_game_state.board)
+    for order, succeeded in new_positions:
+        print(order, "succeeds" if succeeded else "fails")
+    initial_game_state.apply(new_positions)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+"""
+Process wide cache of map graphs.
+
+The map topology never changes during a game, so each map variant is
+read and turned into a networkx graph once per process. The graph is
+frozen (read-only) and shared by every GameState using the variant.
+The source file is re-checked cheaply (size and modification time) on
+each load; if it changed, its content fingerprint decides whether the
+map has to be rebuilt.
+
+Variants are read from their descriptions (see variants.py), whose
+compiled board is reused. Maps stored as networkx node-link JSON can
+still be loaded by adding them to MAP_FILES.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import networkx as nx
+
+from board_index import index_for_graph
+from variants import load_variant, variant_file
+
+# variant name -> node-link JSON file, for maps without a description
+MAP_FILES = {}
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class _CachedMap:
+    __slots__ = ("stat", "file_hash", "G", "board")
+
+    def __init__(self, stat, file_hash, G, board):
+        self.stat = stat
+        self.file_hash = file_hash
+        self.G = G
+        self.board = board
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_map(variant="standard"):
+    """
+    Return (G, board) for a map variant: the frozen networkx graph and
+    its compiled board index (see board_index.py).
+    """
+    path = MAP_FILES.get(variant) or variant_file(variant)
+    stat = _stat_key(path)
+    cached = _cache.get(variant)
+    if cached is not None and cached.stat == stat:
+        return cached.G, cached.board
+    with _lock:
+        cached = _cache.get(variant)
+        with open(path, "rb") as f:
+            raw = f.read()
+        file_hash = hashlib.sha1(raw).hexdigest()
+        if cached is None or cached.file_hash != file_hash:
+            if variant in MAP_FILES:
+                G = nx.freeze(nx.node_link_graph(json.loads(raw)))
+                board = index_for_graph(G)
+            else:
+                described = load_variant(variant)
+                G = nx.freeze(described.graph())
+                board = index_for_graph(G, described.board)
+            cached = _CachedMap(stat, file_hash, G, board)
+            _cache[variant] = cached
+        else:
+            # touched but unchanged
+            cached.stat = stat
+    return cached.G, cached.board
+
+
+def map_fingerprint(variant="standard"):
+    """
+    Topology fingerprint of a variant, see board_index.BoardIndex.
+    """
+    return load_map(variant)[1].fingerprint
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
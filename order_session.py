@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+"""
+Incremental order validation for order editors.
+
+A session holds one order per unit and keeps, for each of them, the
+Reason it is illegal (see orders.order_reason) and whether it is
+matched by the order it refers to:
+
+    support hold: the supported unit doesn't move
+    support move, convoy: the supported/convoyed unit makes that move
+    convoyed army move: at least one matching convoy order
+
+Units don't move while orders are written, so the legality of an
+order never depends on the other orders; only matching does. The
+session records which orders refer to each unit, so changing one
+order re-checks that order, the orders referring to its unit and the
+unit it refers to, however many units are on the board.
+
+    session = OrderSession(game_state)
+    session.set_order("A Par-Bur")
+    session.reason(location), session.is_matched(location)
+"""
+from convoys import fleets_at_sea
+from order_types import CONVOY, HOLD, MOVE, SUPPORT, Order, parse_order
+from orders import Reason, order_reason
+from units import all_units
+
+
+class OrderSession:
+    """
+    Orders being written for a position, see the module docstring.
+    Every unit starts with a hold order. State is kept per province id
+    since supports and convoys name provinces, not coasts.
+    """
+
+    def __init__(self, game_state):
+        self.board = board = game_state.board
+        units = all_units(game_state.units)
+        self._fleets = fleets_at_sea(units, board)
+        self._units = {}
+        self._orders = {}
+        self._reasons = {}
+        self._matched = {}
+        # province -> provinces whose orders refer to its unit
+        self._dependants = {}
+        for unit in units:
+            province = board.location_province[unit.location]
+            self._units[province] = unit
+            self._orders[province] = Order(HOLD, unit.type, unit.location,
+                                           power=unit.home_power)
+            self._reasons[province] = Reason.VALID
+            self._matched[province] = True
+            self._dependants[province] = set()
+
+    def __len__(self):
+        return len(self._orders)
+
+    def _referenced(self, order):
+        # province of the unit a support or convoy refers to
+        if order.kind == SUPPORT or order.kind == CONVOY:
+            return self.board.location_province[order.source]
+        return -1
+
+    def set_order(self, order):
+        """
+        Replace the order of the unit it is given to (Order or text).
+        Raises ValueError for unparseable text or if there is no unit.
+        Returns the locations of the units whose orders were re-checked.
+        """
+        board = self.board
+        if isinstance(order, str):
+            order = parse_order(order, board)
+        province = board.location_province[order.location]
+        unit = self._units.get(province)
+        if unit is None:
+            raise ValueError(f"No unit in {board.province_names[province]}")
+        # orders may name a split coast province without its coast
+        order = order._replace(location=unit.location,
+                               power=order.power or unit.home_power)
+        old = self._orders[province]
+        old_referenced = self._referenced(old)
+        if old_referenced >= 0 and old_referenced in self._dependants:
+            self._dependants[old_referenced].discard(province)
+        referenced = self._referenced(order)
+        if referenced >= 0 and referenced in self._dependants:
+            self._dependants[referenced].add(province)
+        self._orders[province] = order
+        if unit.type != order.unit_type:
+            self._reasons[province] = Reason.WRONG_UNIT_TYPE
+        else:
+            self._reasons[province] = order_reason(order, board, self._fleets)
+        affected = {province} | self._dependants[province]
+        for other in (old_referenced, referenced):
+            if other in self._units:
+                affected.add(other)
+        # convoys first, convoyed moves are matched by them
+        for other in sorted(affected, key=lambda p: self._orders[p].kind != CONVOY):
+            self._matched[other] = self._match(other)
+        return {self._units[other].location for other in affected}
+
+    def _match(self, province):
+        order = self._orders[province]
+        if order.kind == HOLD:
+            return True
+        location_province = self.board.location_province
+        if order.kind == MOVE:
+            if order.unit_type != "A" or self.board.can_move(
+                    "A", order.location, order.target):
+                return True
+            target = location_province[order.target]
+            for dependant in self._dependants[province]:
+                convoy = self._orders[dependant]
+                if (convoy.kind == CONVOY and
+                    location_province[convoy.target] == target):
+                    return True
+            return False
+        supported = self._orders.get(location_province[order.source])
+        if supported is None:
+            return False
+        if order.target < 0:
+            return supported.kind != MOVE
+        return (supported.kind == MOVE and
+                location_province[supported.target] ==
+                location_province[order.target] and
+                (order.kind == SUPPORT or supported.unit_type == "A"))
+
+    def _province(self, location):
+        return self.board.location_province[location]
+
+    def unit(self, location):
+        """
+        The unit in the province of `location`, None if it is empty.
+        """
+        return self._units.get(self._province(location))
+
+    def order(self, location):
+        return self._orders[self._province(location)]
+
+    def reason(self, location):
+        return self._reasons[self._province(location)]
+
+    def is_valid(self, location):
+        return self._reasons[self._province(location)] == Reason.VALID
+
+    def is_matched(self, location):
+        return self._matched[self._province(location)]
+
+    def orders(self, power=None):
+        """
+        Current orders, of one power if given.
+        """
+        return [order for order in self._orders.values()
+                if power is None or order.power == power]
+
+    def problems(self):
+        """
+        {location: (reason, matched)} of every order that is illegal
+        or unmatched.
+        """
+        return {self._orders[province].location:
+                (self._reasons[province], self._matched[province])
+                for province in self._orders
+                if self._reasons[province] != Reason.VALID or
+                not self._matched[province]}
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+"""
+Compact order records.
+
+Orders are tuples of integers (location ids from board_index.py) and
+short strings, so they are cheap to build, hash and compare. The
+familiar text form is only produced or read at the edges:
+
+    Hold: F Lon Holds
+    Move: A Par-Bur
+    Support: A Par S A Mar-Bur, A Par S A Mar
+    Convoy: F Bla C A Ank-Sev
+    Retreat: F Nth R Nwy
+    Disband: A Bur Disband
+    Build: F StP_NC Build
+"""
+import enum
+
+from typing import NamedTuple
+
+from board_index import standard_board
+
+
+class OrderKind(enum.IntEnum):
+    HOLD = 0
+    MOVE = 1
+    SUPPORT = 2
+    CONVOY = 3
+    # retreat and adjustment phases, see phases.py
+    RETREAT = 4
+    DISBAND = 5
+    BUILD = 6
+
+HOLD, MOVE, SUPPORT, CONVOY, RETREAT, DISBAND, BUILD = OrderKind
+
+
+class Order(NamedTuple):
+    """
+    kind: OrderKind
+    unit_type: "A" or "F"
+    location: location id of the ordered unit
+    target: destination of a move or retreat, or of the supported/convoyed
+        move. -1 for holds, support holds, disbands and builds
+    source: location of the supported/convoyed unit, -1 otherwise
+    source_type: type of the supported/convoyed unit, "" otherwise
+    power: power giving the order, "" if unknown (e.g. parsed text)
+    """
+    kind: OrderKind
+    unit_type: str
+    location: int
+    target: int = -1
+    source: int = -1
+    source_type: str = ""
+    power: str = ""
+
+    def __str__(self):
+        return render_order(self)
+
+    def supported_order(self):
+        """
+        The hold or move order a support/convoy order refers to.
+        """
+        if self.target < 0:
+            return Order(OrderKind.HOLD, self.source_type, self.source)
+        return Order(OrderKind.MOVE, self.source_type, self.source, self.target)
+
+
+def render_order(order, board=None):
+    """
+    Text form of an order, e.g. "A Par S A Mar-Bur".
+    """
+    names = (board or standard_board()).location_names
+    prefix = f"{order.unit_type} {names[order.location]}"
+    if order.kind == HOLD:
+        return prefix + " Holds"
+    if order.kind == MOVE:
+        return f"{prefix}-{names[order.target]}"
+    if order.kind == RETREAT:
+        return f"{prefix} R {names[order.target]}"
+    if order.kind == DISBAND:
+        return prefix + " Disband"
+    if order.kind == BUILD:
+        return prefix + " Build"
+    supported = f"{order.source_type} {names[order.source]}"
+    if order.target >= 0:
+        supported += f"-{names[order.target]}"
+    if order.kind == SUPPORT:
+        return f"{prefix} S {supported}"
+    return f"{prefix} C {supported}"
+
+
+def _parse_unit(text, location_ids):
+    unit_type, province = text.split(" ")
+    if unit_type not in ("A", "F"):
+        raise ValueError(f"Unknown unit type {unit_type!r}")
+    try:
+        return unit_type, location_ids[province]
+    except KeyError:
+        raise ValueError(f"Unknown province {province!r}") from None
+
+
+def _parse_move(text, location_ids):
+    if "-" not in text:
+        return _parse_unit(text, location_ids) + (-1,)
+    unit, to_province = text.split("-")
+    if to_province not in location_ids:
+        raise ValueError(f"Unknown province {to_province!r}")
+    return _parse_unit(unit, location_ids) + (location_ids[to_province],)
+
+
+def parse_order(text, board=None, power=""):
+    """
+    Parse the text form of an order. Raises ValueError if the text is
+    not a well formed order on `board`.
+    """
+    location_ids = (board or standard_board()).location_ids
+    try:
+        for suffix, kind in ((" Holds", HOLD), (" Disband", DISBAND),
+                             (" Build", BUILD)):
+            if text.endswith(suffix):
+                unit_type, location = _parse_unit(text[:-len(suffix)], location_ids)
+                return Order(kind, unit_type, location, power=power)
+        if " R " in text:
+            unit, to_province = text.split(" R ")
+            unit_type, location = _parse_unit(unit, location_ids)
+            if to_province not in location_ids:
+                raise ValueError(f"Unknown province {to_province!r}")
+            return Order(RETREAT, unit_type, location, location_ids[to_province],
+                         power=power)
+        for separator, kind in ((" S ", SUPPORT), (" C ", CONVOY)):
+            if separator in text:
+                unit, supported = text.split(separator)
+                unit_type, location = _parse_unit(unit, location_ids)
+                source_type, source, target = _parse_move(supported, location_ids)
+                if kind == CONVOY and target < 0:
+                    raise ValueError("Convoy orders need a destination")
+                return Order(kind, unit_type, location, target, source,
+                             source_type, power)
+        unit_type, location, target = _parse_move(text, location_ids)
+    except ValueError as e:
+        raise ValueError(f"Could not parse order {text!r}: {e}") from None
+    if target < 0:
+        raise ValueError(f"Could not parse order {text!r}")
+    return Order(MOVE, unit_type, location, target, power=power)
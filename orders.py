@@ -3,121 +3,598 @@
 """
 Resolves orders for a given turn
 """
-def get_edge(from_province, to_province):
-    edge = []
-    coast = None
-    for province in [from_province, to_province]:
-        # assume no provinces with split coast are adjacent
-        # True for a standard game 
-        
-        if "_" in province:
-            province, coast = province.split("_")
-            if "S" in coast:
-                coast = "south"
-            elif "N" in coast:
-                coast = "north"
-        edge.append(province)
-    return edge, coast
+import enum
 
-def move_is_valid(move_order, game_state):
+from array import array
+
+from board_index import IMPASSIBLE, INLAND, WATER, iter_bits, standard_board
+from convoys import convoy_router, fleets_at_sea
+from order_types import CONVOY, HOLD, MOVE, SUPPORT, Order, parse_order
+from units import all_units
+
+def _as_order(order, board):
     """
-    Check that movement order is valid
-    Steps:
-        1. Check province is adjacent (include coasts)
-        2. Check army (fleet) is not moving to water (inland)
+    Orders may still be given as text at the edges, parse those once.
+    Returns None for text that is not an order on this board.
     """
-    move_order_split = move_order.split(" ")
-    unit_type = move_order_split[0]
-    from_province, to_province = move_order_split[1].split("-")
-    edge, coast = get_edge(from_province, to_province)
-   
-    from_province, to_province = edge
-    # check if provinces are adjacent
-    if to_province not in game_state.G[from_province]:
-        return False
-    
-    # check coasts match
-            
-    if game_state.G.edges[edge].get("coast") != coast:
-        return False
-    
-    # check fleet not moving across land only border
-    if unit_type == "F" and game_state.G.edges[edge].get("land_only"):
-        return False
+    if isinstance(order, str):
+        try:
+            return parse_order(order, board)
+        except ValueError:
+            return None
+    return order
 
-    # check unit not moving to forbidden province type
-    if (unit_type == "A" and
-        game_state.G.nodes[to_province]["type"] == "water") or\
-    (unit_type == "F" and
-     game_state.G.nodes[to_province]["type"] == "inland"):
-        return False
-    
-    return True
+class Reason(enum.IntEnum):
+    """
+    Why an order is illegal, VALID if it isn't.
+    """
+    VALID = 0
+    UNKNOWN_ORDER = 1       # text that doesn't parse on this board
+    NOT_ADJACENT = 2
+    WRONG_COAST = 3         # coast missing, not reachable, or given for an army
+    LAND_ONLY_BORDER = 4    # fleet crossing a land only border
+    WRONG_TERRAIN = 5       # army to water, fleet inland, impassible
+    CONVOY_NOT_WATER = 6    # convoying fleet is not at sea
+    WRONG_UNIT_TYPE = 7     # convoy not by a fleet or not of an army
+    NO_CONVOY_ROUTE = 8     # no chain of fleets links the two coasts
 
-def order_is_valid(order, game_state):
+def _move_reason(board, unit_type, from_location, to_location):
+    """
+    Why a unit can't move between two locations (the move is known to
+    be illegal, this only finds the explanation).
+    """
+    location_province = board.location_province
+    from_province = location_province[from_location]
+    to_province = location_province[to_location]
+    if not board.adjacency[from_province] >> to_province & 1:
+        return Reason.NOT_ADJACENT
+    to_type = board.province_type[to_province]
+    if (to_type == IMPASSIBLE or
+        (unit_type == "A" and to_type == WATER) or
+        (unit_type == "F" and to_type == INLAND)):
+        return Reason.WRONG_TERRAIN
+    if unit_type == "F" and board.land_only[from_province] >> to_province & 1:
+        return Reason.LAND_ONLY_BORDER
+    return Reason.WRONG_COAST
+
+def _reach_reason(board, unit_type, from_location, to_province):
+    # as _move_reason, for supports given into a whole province
+    if board.can_reach(unit_type, from_location, to_province):
+        return Reason.VALID
+    return _move_reason(board, unit_type, from_location, to_province)
+
+def _unit_move_reason(board, unit_type, from_location, to_location, fleets):
+    # a move, which armies may also make along a chain of fleets
+    if board.can_move(unit_type, from_location, to_location):
+        return Reason.VALID
+    reason = _move_reason(board, unit_type, from_location, to_location)
+    if reason == Reason.NOT_ADJACENT and unit_type == "A" and fleets is not None:
+        from_province = board.location_province[from_location]
+        to_province = board.location_province[to_location]
+        if convoy_router(board).can_convoy(fleets, from_province, to_province):
+            return Reason.VALID
+        coastal_mask = board.coastal_mask
+        if coastal_mask >> from_province & 1 and coastal_mask >> to_province & 1:
+            return Reason.NO_CONVOY_ROUTE
+    return reason
+
+def order_reason(order, board, fleets=None):
     """
-    Check if order is legal.
+    Check if order is legal, returns a Reason (Reason.VALID if legal).
+    `fleets` is the bitmask of sea provinces holding fleets (see
+    convoys.py); if given, armies may move (and be supported to move)
+    along a chain of fleets and convoys must lie on a chain linking
+    the army to its destination.
     Orders are constructed per unit.
     This implies:
         unit always exists
         from_province is always correct
         Hold orders are always valid
-       
     """
-
-    if "Holds" in order:
-        return True
-    support_order = " S " in order
-    convoy_order = " C " in order
-    # can't have a support-convoy order
-    if not support_order and not convoy_order:
-        return move_is_valid(order, game_state)
-    elif support_order:
+    order = _as_order(order, board)
+    if order is None:
+        return Reason.UNKNOWN_ORDER
+    kind = order.kind
+    if kind == HOLD:
+        return Reason.VALID
+    if kind == MOVE:
+        return _unit_move_reason(board, order.unit_type, order.location,
+                                 order.target, fleets)
+    elif kind == SUPPORT:
         """
         1. Check province to which support is given is valid
         2. Check if support hold or support move
         If support move:
-            1. Check move to support is valid
+            1. Check move to support is valid, by convoy too
         """
-        support_from, support_to =  order.split(" S ")
-        support_unit_type, support_from_province = support_from.split(" ")
-        support_to_province = support_to.split("-")[-1]
-
-        if support_to_province not in game_state.G[support_from_province]:
-            return False
-        
-        if not move_is_valid(support_to, game_state):
-            return False
-        
-        edge, coast = get_edge(support_from_province, support_to_province)
-        if support_unit_type == "F" and game_state.G.edges[edge].get("land_only"):
-            return False
-        if (support_unit_type == "A" and
-            game_state.G.nodes[support_to_province]["type"] == "water") or\
-        (support_unit_type == "F" and
-         game_state.G.nodes[support_to_province]["type"] == "inland"):
-            return False
-        return True
-    elif convoy_order:
-        convoying_unit, convoyed_unit = order.split(" C ")
-        convoying_unit_type, convoying_unit_province = convoying_unit.split(" ")
-        if convoying_unit_type != "F":
+        if order.target >= 0:
+            reason = _unit_move_reason(board, order.source_type, order.source,
+                                       order.target, fleets)
+            if reason != Reason.VALID:
+                return reason
+            support_to_location = order.target
+        else:
+            # support hold
+            support_to_location = order.source
+        # support is given to a province, whichever coast the unit is on
+        return _reach_reason(board, order.unit_type, order.location,
+                             board.location_province[support_to_location])
+    elif kind == CONVOY:
+        if order.unit_type != "F":
             # only fleets can convoy
-            return False
-        if game_state.G.nodes[convoying_unit_province] != "water":
+            return Reason.WRONG_UNIT_TYPE
+        fleet_province = board.location_province[order.location]
+        if board.province_type[fleet_province] != WATER:
             # cannot convoy from coast
-            return False
-        convoyed_unit_type, convoyed_unit_order = convoyed_unit.split(" ")
-        if convoyed_unit_type != "A":
+            return Reason.CONVOY_NOT_WATER
+        if order.source_type != "A":
             # only armies can be convoyed
+            return Reason.WRONG_UNIT_TYPE
+        if fleets is not None:
+            # the fleet's chain must reach both ends of the convoy
+            chain = convoy_router(board).chain_of(
+                fleets | 1 << fleet_province, fleet_province)
+            army_province = board.location_province[order.source]
+            to_province = board.location_province[order.target]
+            if (army_province == to_province or
+                not chain[1] >> army_province & 1 or
+                not chain[1] >> to_province & 1):
+                return Reason.NO_CONVOY_ROUTE
+        return Reason.VALID
+    return Reason.UNKNOWN_ORDER
+
+def move_is_valid(move_order, game_state):
+    """
+    Check that movement order is valid
+    Steps:
+        1. Check province is adjacent (include coasts)
+        2. Check army (fleet) is not moving to water (inland)
+    Both are answered by the compiled board index, see board_index.py
+    """
+    board = game_state.board
+    move_order = _as_order(move_order, board)
+    if move_order is None or move_order.kind != MOVE:
+        return False
+    return board.can_move(move_order.unit_type, move_order.location,
+                          move_order.target)
+
+def order_is_valid(order, game_state):
+    """
+    Check if order is legal, see order_reason for why it isn't.
+    Convoys and convoyed moves are checked against the fleets of
+    game_state.
+    """
+    board = game_state.board
+    order = _as_order(order, board)
+    if order is None:
+        return False
+    fleets = None
+    if order.kind == CONVOY or (
+            order.kind == MOVE and order.unit_type == "A" and
+            not board.can_move("A", order.location, order.target)) or (
+            order.kind == SUPPORT and order.target >= 0 and
+            order.source_type == "A" and
+            not board.can_move("A", order.source, order.target)):
+        fleets = fleets_at_sea(all_units(game_state.units), board)
+    return order_reason(order, board, fleets) == Reason.VALID
+
+def validate_orders(orders, game_state):
+    """
+    Validate a whole batch of orders (Order records or text) at once.
+    Text orders are parsed once per distinct string, so repeated
+    orders across many games cost a dict lookup.
+    Returns (verdicts, reasons): bytes of 1 (legal) / 0 (illegal) and
+    an array("B") of Reason codes, one per order.
+    """
+    board = game_state.board
+    can_move = board.can_move
+    fleets = fleets_at_sea(all_units(game_state.units), board)
+    parsed = {}
+    reasons = array("B", bytes(len(orders)))
+    for i, order in enumerate(orders):
+        if isinstance(order, str):
+            if order not in parsed:
+                parsed[order] = _as_order(order, board)
+            order = parsed[order]
+            if order is None:
+                reasons[i] = Reason.UNKNOWN_ORDER
+                continue
+        # the common cases first, without a function call per order
+        kind = order.kind
+        if kind == HOLD:
+            continue
+        if kind == MOVE and can_move(order.unit_type, order.location, order.target):
+            continue
+        reasons[i] = order_reason(order, board, fleets)
+    verdicts = bytes(reason == Reason.VALID for reason in reasons)
+    return verdicts, reasons
+
+
+
+def legal_orders(units, board, power=None):
+    """
+    Every legal order for each unit, built directly from the board's
+    neighbour tables rather than by validating candidate orders.
+    `units` holds every unit on the board so that any of them can be
+    supported or convoyed, orders are only returned for units of
+    `power` (all units if None).
+    Steps:
+        1. Holds and moves from the neighbour tables
+        2. Convoyed moves along chains of fleets at sea
+        3. Supports for every hold and move into a province the unit
+           could move to itself
+        4. Convoys for every army along each fleet's chain
+    Returns {location: tuple of orders}.
+    """
+    location_province = board.location_province
+    placed = []
+    occupied = {}
+    fleets = 0
+    for unit in units:
+        location = unit.location
+        province = location_province[location]
+        placed.append((unit.home_power, unit.type, location, province))
+        occupied[province] = (unit.type, location)
+        if unit.type == "F" and board.water_mask >> province & 1:
+            fleets |= 1 << province
+    chains = convoy_router(board).chains(fleets)
+
+    moves = {}
+    moves_into = {}
+    for unit_power, unit_type, location, province in placed:
+        targets = board.neighbours(unit_type, location)
+        if unit_type == "A" and chains:
+            convoy_targets = 0
+            for chain, shore in chains:
+                if shore >> province & 1:
+                    convoy_targets |= shore
+            convoy_targets &= ~board.army_moves[location] & ~(1 << province)
+            targets += tuple(iter_bits(convoy_targets))
+        unit_moves = [Order(MOVE, unit_type, location, target, power=unit_power)
+                      for target in targets]
+        moves[location] = unit_moves
+        for order in unit_moves:
+            moves_into.setdefault(location_province[order.target], []).append(order)
+
+    legal = {}
+    for unit_power, unit_type, location, province in placed:
+        if power is not None and unit_power != power:
+            continue
+        unit_orders = [Order(HOLD, unit_type, location, power=unit_power)]
+        unit_orders += moves[location]
+        reach = (board.fleet_reach if unit_type == "F" else board.army_reach)[location]
+        for to_province in iter_bits(reach):
+            if to_province in occupied:
+                supported_type, supported_location = occupied[to_province]
+                unit_orders.append(Order(SUPPORT, unit_type, location, -1,
+                                         supported_location, supported_type,
+                                         unit_power))
+            for move in moves_into.get(to_province, ()):
+                if move.location != location:
+                    unit_orders.append(Order(SUPPORT, unit_type, location,
+                                             move.target, move.location,
+                                             move.unit_type, unit_power))
+        if unit_type == "F" and fleets >> province & 1:
+            for chain, shore in chains:
+                if not chain >> province & 1:
+                    continue
+                for army_province in iter_bits(shore):
+                    army = occupied.get(army_province)
+                    if army is None or army[0] != "A":
+                        continue
+                    for target in iter_bits(shore & ~(1 << army_province)):
+                        unit_orders.append(Order(CONVOY, "F", location, target,
+                                                 army[1], "A", unit_power))
+        legal[location] = tuple(unit_orders)
+    return legal
+
+UNRESOLVED, GUESSING, RESOLVED = range(3)
+
+class Resolution:
+    """
+    Outcome of a movement phase.
+        orders: the orders that were resolved
+        results: per order, whether it succeeded. Moves succeed if the
+            unit moved, supports and convoys if they were not cut or
+            disrupted (and matched an order), holds if not dislodged
+        dislodged: location of each dislodged unit -> province id the
+            attacker came from (retreats can't go there), -1 if it was
+            convoyed
+        contested: province ids left empty by a standoff
+    """
+    __slots__ = ("orders", "results", "dislodged", "contested", "_by_order")
+
+    def __init__(self, orders, results, dislodged, contested):
+        self.orders = orders
+        self.results = results
+        self.dislodged = dislodged
+        self.contested = contested
+        self._by_order = None
+
+    def __repr__(self):
+        return (f"Resolution({sum(self.results)}/{len(self.orders)} orders "
+                f"succeeded, {len(self.dislodged)} dislodged)")
+
+    def __iter__(self):
+        return zip(self.orders, self.results)
+
+    def outcome(self, order):
+        if self._by_order is None:
+            self._by_order = dict(zip(self.orders, self.results))
+        return self._by_order[order]
+
+class _Adjudicator:
+    """
+    Guess-and-check adjudicator (L. Kruijswijk, "The Math of
+    Adjudication"). Every order depends on a few others; each order is
+    resolved recursively and cycles of dependencies are broken by
+    guessing an outcome and checking whether the guess is consistent.
+    Cycles with zero or two consistent outcomes are circular movement
+    (all moves succeed) or convoy paradoxes (Szykman rule: the convoys
+    fail).
+
+    All per-order data is kept in lists indexed by order number and
+    provinces are integer ids from the board index.
+    """
+    __slots__ = ("board", "router", "n", "kind", "province", "target", "source", "power",
+                 "unit_at", "moves_to", "supports", "convoys", "via_convoy",
+                 "head_to_head", "state", "result", "dep_list")
+
+    def __init__(self, orders, board):
+        self.board = board
+        self.router = convoy_router(board)
+        self.n = n = len(orders)
+        location_province = board.location_province
+        kind = []
+        province = []
+        target = []
+        source = []
+        power = []
+        power_ids = {}
+        unit_at = {}
+        moves_to = {}
+        for i, order in enumerate(orders):
+            kind.append(order.kind)
+            unit_province = location_province[order.location]
+            province.append(unit_province)
+            unit_at[unit_province] = i
+            target.append(location_province[order.target]
+                          if order.target >= 0 else -1)
+            source.append(location_province[order.source]
+                          if order.source >= 0 else -1)
+            # unknown powers never count as the same power
+            power.append(power_ids.setdefault(order.power, len(power_ids))
+                         if order.power else -1 - i)
+            if order.kind == MOVE:
+                moves_to.setdefault(target[i], []).append(i)
+        supports = [[] for _ in range(n)]
+        convoys = [[] for _ in range(n)]
+        state = [UNRESOLVED] * n
+        for i in range(n):
+            if kind[i] != SUPPORT and kind[i] != CONVOY:
+                continue
+            supported = unit_at.get(source[i], -1)
+            if supported < 0:
+                matched = False
+            elif target[i] < 0:
+                # support hold
+                matched = kind[supported] != MOVE
+            else:
+                matched = (kind[supported] == MOVE and
+                           target[supported] == target[i] and
+                           (kind[i] == SUPPORT or
+                            orders[supported].unit_type == "A"))
+            if matched:
+                (supports if kind[i] == SUPPORT else convoys)[supported].append(i)
+            else:
+                # supports and convoys that match no order have no effect
+                state[i] = RESOLVED
+        army_moves = board.army_moves
+        via_convoy = [False] * n
+        head_to_head = [-1] * n
+        for i, order in enumerate(orders):
+            if kind[i] == MOVE and order.unit_type == "A":
+                # an army moving to an adjacent province only goes by
+                # sea if its own power convoys it
+                via_convoy[i] = (
+                    not army_moves[order.location] >> order.target & 1 or
+                    any(power[c] == power[i] for c in convoys[i]))
+        for i in range(n):
+            if kind[i] == MOVE and not via_convoy[i]:
+                j = unit_at.get(target[i], -1)
+                if (j >= 0 and kind[j] == MOVE and
+                    not via_convoy[j] and target[j] == province[i]):
+                    head_to_head[i] = j
+        self.kind = kind
+        self.province = province
+        self.target = target
+        self.source = source
+        self.power = power
+        self.unit_at = unit_at
+        self.moves_to = moves_to
+        self.supports = supports
+        self.convoys = convoys
+        self.via_convoy = via_convoy
+        self.head_to_head = head_to_head
+        self.state = state
+        self.result = [False] * n
+        self.dep_list = []
+
+    def resolve(self, nr):
+        state = self.state
+        if state[nr] == RESOLVED:
+            return self.result[nr]
+        dep_list = self.dep_list
+        if state[nr] == GUESSING:
+            # recorded every time it is read, so whoever reads a guess
+            # depends on it even if the guess is already in the list
+            dep_list.append(nr)
+            return self.result[nr]
+        old_count = len(dep_list)
+        self.result[nr] = False
+        state[nr] = GUESSING
+        first_result = self.adjudicate(nr)
+        if len(dep_list) == old_count:
+            # not dependent on any guess
+            if state[nr] != RESOLVED:
+                self.result[nr] = first_result
+                state[nr] = RESOLVED
+            return first_result
+        if dep_list[old_count] != nr:
+            # dependent on a guess, but not our own
+            dep_list.append(nr)
+            self.result[nr] = first_result
+            return first_result
+        # dependent on our own guess, try the other one
+        while len(dep_list) > old_count:
+            state[dep_list.pop()] = UNRESOLVED
+        self.result[nr] = True
+        state[nr] = GUESSING
+        second_result = self.adjudicate(nr)
+        if first_result == second_result:
+            while len(dep_list) > old_count:
+                state[dep_list.pop()] = UNRESOLVED
+            self.result[nr] = first_result
+            state[nr] = RESOLVED
+            return first_result
+        self.backup_rule(old_count)
+        return self.resolve(nr)
+
+    def backup_rule(self, old_count):
+        cycle = self.dep_list[old_count:]
+        del self.dep_list[old_count:]
+        kind = self.kind
+        # a convoy in the cycle makes it a paradox, otherwise the cycle
+        # is circular movement
+        paradox = any(kind[i] == CONVOY for i in cycle)
+        settled = CONVOY if paradox else MOVE
+        for i in cycle:
+            if kind[i] == settled:
+                self.result[i] = not paradox
+                self.state[i] = RESOLVED
+            else:
+                self.state[i] = UNRESOLVED
+
+    def adjudicate(self, nr):
+        kind = self.kind[nr]
+        if kind == MOVE:
+            return self.move_succeeds(nr)
+        if kind == SUPPORT:
+            return not self.support_is_cut(nr)
+        # holds and convoys stand unless dislodged
+        for attacker in self.moves_to.get(self.province[nr], ()):
+            if self.resolve(attacker):
+                return False
+        return True
+
+    def move_succeeds(self, nr):
+        if not self.has_path(nr):
+            return False
+        attack = self.attack_strength(nr)
+        opponent = self.head_to_head[nr]
+        if opponent >= 0:
+            if attack <= self.defend_strength(opponent):
+                return False
+        elif attack <= self.hold_strength(self.target[nr]):
             return False
+        for other in self.moves_to[self.target[nr]]:
+            if other != nr and attack <= self.prevent_strength(other):
+                return False
         return True
 
+    def support_is_cut(self, nr):
+        province = self.province[nr]
+        power = self.power[nr]
+        supported_to = self.target[nr]
+        if supported_to < 0:
+            supported_to = self.source[nr]
+        for attacker in self.moves_to.get(province, ()):
+            if self.power[attacker] == power or not self.has_path(attacker):
+                continue
+            if self.province[attacker] != supported_to:
+                return True
+            # attacked from where the support is directed, only cut if
+            # the supporting unit is dislodged
+            if self.resolve(attacker):
+                return True
+        return False
+
+    def has_path(self, nr):
+        if not self.via_convoy[nr]:
+            return True
+        convoying = 0
+        for convoy in self.convoys[nr]:
+            if self.resolve(convoy):
+                convoying |= 1 << self.province[convoy]
+        return self.router.can_convoy(convoying, self.province[nr], self.target[nr])
+
+    def supporting_strength(self, nr, excluded_power=None):
+        strength = 1
+        for support in self.supports[nr]:
+            if self.power[support] != excluded_power and self.resolve(support):
+                strength += 1
+        return strength
 
+    def hold_strength(self, province):
+        unit = self.unit_at.get(province, -1)
+        if unit < 0:
+            return 0
+        if self.kind[unit] == MOVE:
+            return 0 if self.resolve(unit) else 1
+        return self.supporting_strength(unit)
 
-def order_resolver(order_list):
+    def attack_strength(self, nr):
+        if not self.has_path(nr):
+            return 0
+        defender = self.unit_at.get(self.target[nr], -1)
+        if (defender < 0 or
+            (self.kind[defender] == MOVE and
+             self.head_to_head[nr] != defender and self.resolve(defender))):
+            return self.supporting_strength(nr)
+        if self.power[defender] == self.power[nr]:
+            # can't dislodge your own unit
+            return 0
+        # nor help anyone dislodge it
+        return self.supporting_strength(nr, self.power[defender])
+
+    def defend_strength(self, nr):
+        return self.supporting_strength(nr)
+
+    def prevent_strength(self, nr):
+        if not self.has_path(nr):
+            return 0
+        opponent = self.head_to_head[nr]
+        if opponent >= 0 and self.resolve(opponent):
+            return 0
+        return self.supporting_strength(nr)
+
+    def resolve_all(self, orders):
+        results = tuple(self.resolve(i) for i in range(self.n))
+        dislodged = {}
+        contested = set()
+        for province, attackers in self.moves_to.items():
+            winners = [i for i in attackers if results[i]]
+            unit = self.unit_at.get(province, -1)
+            vacated = unit < 0 or (self.kind[unit] == MOVE and results[unit])
+            if winners:
+                if not vacated:
+                    winner = winners[0]
+                    # a convoyed attacker doesn't block the retreat
+                    # to where it came from
+                    dislodged[orders[unit].location] = (
+                        -1 if self.via_convoy[winner] else self.province[winner])
+            elif len(attackers) > 1 and vacated:
+                contested.add(province)
+        return Resolution(orders, results, dislodged, frozenset(contested))
+
+def order_resolver(order_list, board=None):
     """
     Function to resolve list of orders.
+    Orders are `order_types.Order` records, one per unit. They are
+    assumed to be legal (see order_is_valid), illegal orders should be
+    replaced by holds beforehand.
+    Returns a Resolution.
     """
-
-    pass
\ No newline at end of file
+    orders = tuple(order_list)
+    board = board or standard_board()
+    return _Adjudicator(orders, board).resolve_all(orders)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+
+"""
+Seasons, retreats and adjustments.
+
+A game year is played in up to five phases:
+
+    Spring Movement -> (Spring Retreats) -> Fall Movement ->
+    (Fall Retreats) -> (Winter Adjustments) -> next year
+
+Retreat phases only happen when units were dislodged and adjustments
+only when some power has more or fewer supply centres than units.
+Supply centres change hands at the end of the fall, when each one
+belongs to the power of the unit standing in it. Ownership is kept as
+one bitmask of province ids per power ("centre masks"), so counting a
+power's centres or checking for a winner is a popcount.
+
+These functions work on Unit iterables and the board index and don't
+change anything, GameState.process (game_state.py) carries the
+results out. Order kinds are those of order_types.py:
+
+    retreat phases: RETREAT to an adjacent province, or DISBAND
+    adjustments: BUILD on an owned, empty home centre, or DISBAND
+"""
+import enum
+
+from board_index import WATER, iter_bits
+from order_types import BUILD, DISBAND, RETREAT, Order
+from units import unit_from_ids
+
+
+class Phase(enum.IntEnum):
+    SPRING_MOVEMENT = 0
+    SPRING_RETREATS = 1
+    FALL_MOVEMENT = 2
+    FALL_RETREATS = 3
+    WINTER_ADJUSTMENTS = 4
+
+    def __str__(self):
+        return self.name.replace("_", " ").title()
+
+
+MOVEMENT_PHASES = (Phase.SPRING_MOVEMENT, Phase.FALL_MOVEMENT)
+RETREAT_PHASES = (Phase.SPRING_RETREATS, Phase.FALL_RETREATS)
+
+
+def retreat_restrictions(resolution):
+    """
+    {location of each dislodged unit: bitmask of provinces it can't
+    retreat to}: where its attacker came from (unless it was convoyed)
+    and any province left empty by a standoff.
+    """
+    contested = 0
+    for province in resolution.contested:
+        contested |= 1 << province
+    return {location: contested | (1 << attacker if attacker >= 0 else 0)
+            for location, attacker in resolution.dislodged.items()}
+
+
+def _occupied(units, board):
+    location_province = board.location_province
+    occupied = 0
+    for unit in units:
+        if not unit.dislodged:
+            occupied |= 1 << location_province[unit.location]
+    return occupied
+
+
+def retreat_options(units, restrictions, board, power=None):
+    """
+    Legal retreat phase orders of each dislodged unit (of `power`, or
+    of every power): disbanding first, then every retreat to an
+    adjacent province that is empty, wasn't contested and isn't where
+    the attacker came from.
+    Returns {location: tuple of orders}.
+    """
+    units = list(units)
+    location_province = board.location_province
+    occupied = _occupied(units, board)
+    options = {}
+    for unit in units:
+        if not unit.dislodged or (power is not None and unit.home_power != power):
+            continue
+        blocked = occupied | restrictions.get(unit.location, 0)
+        orders = [Order(DISBAND, unit.type, unit.location, power=unit.home_power)]
+        for target in board.neighbours(unit.type, unit.location):
+            if not blocked >> location_province[target] & 1:
+                orders.append(Order(RETREAT, unit.type, unit.location, target,
+                                    power=unit.home_power))
+        options[unit.location] = tuple(orders)
+    return options
+
+
+def resolve_retreats(orders, board):
+    """
+    Where each retreating unit ends up: {location: target location, or
+    -1 if it is disbanded}. Units retreating to the same province are
+    all disbanded. Dislodged units without an order are disbanded too.
+    """
+    location_province = board.location_province
+    retreats_to = {}
+    for order in orders:
+        if order.kind == RETREAT:
+            province = location_province[order.target]
+            retreats_to[province] = retreats_to.get(province, 0) + 1
+    outcome = {}
+    for order in orders:
+        if (order.kind == RETREAT and
+            retreats_to[location_province[order.target]] == 1):
+            outcome[order.location] = order.target
+        else:
+            outcome[order.location] = -1
+    return outcome
+
+
+def centre_masks(centre_owners, board):
+    """
+    {power: bitmask of owned centres} from {province id: power}.
+    """
+    masks = {power: 0 for power in board.powers}
+    for province, power in centre_owners.items():
+        masks[power] = masks.get(power, 0) | 1 << province
+    return masks
+
+
+def centre_owners_from_masks(masks):
+    """
+    {province id: power} from centre masks.
+    """
+    return {province: power for power, mask in masks.items()
+            for province in iter_bits(mask)}
+
+
+def victory_centres(board):
+    # more than half of the supply centres
+    return board.supply_centre_mask.bit_count() // 2 + 1
+
+
+def centre_masks_after_fall(units, masks, board):
+    """
+    Centre masks once the fall is over: occupied centres belong to the
+    occupying unit's power, others keep their owner.
+    """
+    location_province = board.location_province
+    occupied_by = {}
+    for unit in units:
+        occupied_by[unit.home_power] = (occupied_by.get(unit.home_power, 0) |
+                                        1 << location_province[unit.location])
+    occupied = 0
+    for power, mask in occupied_by.items():
+        occupied_by[power] = mask & board.supply_centre_mask
+        occupied |= occupied_by[power]
+    return {power: masks.get(power, 0) & ~occupied | occupied_by.get(power, 0)
+            for power in set(masks) | set(occupied_by)}
+
+
+def adjustment_counts(units_by_power, masks, board):
+    """
+    {power: supply centres - units}, the number of builds (positive)
+    or disbands (negative) each power has to make.
+    """
+    counts = {power: 0 for power in board.powers}
+    for power, mask in masks.items():
+        counts[power] = mask.bit_count()
+    for power, units in units_by_power.items():
+        counts[power] = counts.get(power, 0) - len(units)
+    return counts
+
+
+def _build_options(power, occupied, masks, board):
+    options = {}
+    home = board.home_centres.get(power, 0) & masks.get(power, 0)
+    for province in iter_bits(home & ~occupied):
+        orders = []
+        if board.province_type[province] != WATER:
+            orders.append(Order(BUILD, "A", province, power=power))
+        for location in board.province_locations[province]:
+            if board.fleet_moves[location]:
+                orders.append(Order(BUILD, "F", location, power=power))
+        options[province] = tuple(orders)
+    return options
+
+
+def adjustment_options(units_by_power, masks, board, power=None):
+    """
+    Legal adjustment orders of `power` (or of every power):
+    builds on each owned, empty home centre (an army, and fleets on
+    each coast a fleet could sail from) if it has builds, or a disband
+    for each of its units if it has to disband.
+    Returns {location: tuple of orders}.
+    """
+    counts = adjustment_counts(units_by_power, masks, board)
+    occupied = _occupied((unit for units in units_by_power.values()
+                          for unit in units), board)
+    options = {}
+    for unit_power, count in counts.items():
+        if power is not None and unit_power != power:
+            continue
+        if count > 0:
+            options.update(_build_options(unit_power, occupied, masks,
+                                          board))
+        elif count < 0:
+            for unit in units_by_power.get(unit_power, ()):
+                options[unit.location] = (
+                    Order(DISBAND, unit.type, unit.location, power=unit_power),)
+    return options
+
+
+def civil_disorder(units, home_centres, count, board):
+    """
+    The `count` units a power disbands when it doesn't order enough
+    disbands: the ones furthest from its home centres, fleets before
+    armies and then by province name on ties.
+    """
+    from distances import UNREACHABLE, distance_tables
+
+    tables = distance_tables(board)
+    homes = list(iter_bits(home_centres))
+
+    def distance(unit):
+        if not homes:
+            return UNREACHABLE
+        if unit.type == "F":
+            row = tables.fleet[unit.location]
+        else:
+            # armies may be convoyed home
+            row = tables.convoy[board.location_province[unit.location]]
+        return int(row[homes].min())
+
+    ranked = sorted(units, key=lambda unit: (-distance(unit), unit.type != "F",
+                                             board.location_names[unit.location]))
+    return ranked[:count]
+
+
+def resolve_adjustments(units_by_power, masks, orders, board):
+    """
+    Carry out adjustment orders, ignoring any that are illegal or over
+    a power's count. Powers that don't order all their disbands are
+    put in civil disorder.
+    Returns (new units, disbanded units).
+    """
+    counts = adjustment_counts(units_by_power, masks, board)
+    options = adjustment_options(units_by_power, masks, board)
+    location_province = board.location_province
+    built = []
+    disbanded = []
+    for power, count in counts.items():
+        if count > 0:
+            provinces = set()
+            for order in orders:
+                if len(provinces) == count:
+                    break
+                province = location_province[order.location]
+                if (order.power == power and province not in provinces and
+                    order in options.get(province, ())):
+                    provinces.add(province)
+                    built.append(unit_from_ids(order.unit_type, power,
+                                               order.location, board))
+        elif count < 0:
+            units = units_by_power.get(power, [])
+            at = {unit.location: unit for unit in units}
+            chosen = []
+            for order in orders:
+                if len(chosen) == -count:
+                    break
+                if (order.kind == DISBAND and order.power == power and
+                    order.location in at):
+                    chosen.append(at.pop(order.location))
+            chosen += civil_disorder(list(at.values()),
+                                     board.home_centres.get(power, 0),
+                                     -count - len(chosen), board)
+            disbanded += chosen
+    return built, disbanded
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+
+"""
+Replay games from a stream of orders.
+
+    python replay.py [log.jsonl | -]
+
+The input is JSON lines, one line per phase, games one after another:
+
+    {"game_id": 7, "year": 1901, "phase": "SPRING_MOVEMENT",
+     "orders": [["France", "A Par-Bur"], ["France", "F Bre-Mid"], ...]}
+
+Only "orders" is required. A game starts from the variant's starting
+position ("variant", default standard) whenever "game_id" changes.
+Orders are [power, text] pairs as in turn files (turn_files.py) or
+just text, in which case they belong to the unit's power. "year" and
+"phase", if given, are checked against the replayed position; logs
+that list empty retreat or adjustment phases this game skips are
+fine.
+
+Each line is validated and resolved against the game's GameState as
+soon as it is read and the outcome is yielded as a ReplayStep, so
+memory doesn't grow with the length of the log. Orders that can't be
+carried out are left out (units without a legal movement order hold)
+and reported in the step.
+
+The GameState of a step is the one being replayed and changes as the
+stream is read on: clone() it to keep a position.
+"""
+import json
+import sys
+
+from typing import NamedTuple
+
+from game_state import GameState
+from order_types import HOLD, Order, parse_order, render_order
+from orders import validate_orders
+from phases import MOVEMENT_PHASES, Phase
+
+
+class ReplayStep(NamedTuple):
+    game_id: object
+    year: int
+    phase: Phase
+    orders: list
+    rejected: list
+    resolution: object
+    game_state: GameState
+
+
+def read_jsonl(lines):
+    """
+    Yield (line number, record) for each non-blank line of a text
+    stream. Raises ValueError for lines that aren't JSON objects.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {number}: {e}") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"line {number}: expected a JSON object")
+        yield number, record
+
+
+def _parse_orders(entries, board):
+    parsed = []
+    rejected = []
+    for entry in entries:
+        power, text = ("", entry) if isinstance(entry, str) else entry
+        try:
+            parsed.append(parse_order(text, board, power))
+        except ValueError:
+            rejected.append(text)
+    return parsed, rejected
+
+
+def _movement_orders(game_state, orders, rejected):
+    """
+    One legal order per unit: the first valid order given to it, or
+    a hold.
+    """
+    board = game_state.board
+    location_province = board.location_province
+    units = {location_province[unit.location]: unit
+             for power_units in game_state.units.values() for unit in power_units}
+    chosen = {}
+    for order in orders:
+        province = location_province[order.location]
+        unit = units.get(province)
+        if (unit is None or province in chosen or unit.type != order.unit_type or
+            order.power not in ("", unit.home_power)):
+            rejected.append(render_order(order, board))
+            continue
+        # orders may name a split coast province without its coast
+        chosen[province] = order._replace(location=unit.location,
+                                          power=unit.home_power)
+    candidates = list(chosen.values())
+    verdicts, _ = validate_orders(candidates, game_state)
+    for order, verdict in zip(candidates, verdicts):
+        if not verdict:
+            rejected.append(render_order(order, board))
+            del chosen[location_province[order.location]]
+    for province, unit in units.items():
+        if province not in chosen:
+            chosen[province] = Order(HOLD, unit.type, unit.location,
+                                     power=unit.home_power)
+    return list(chosen.values())
+
+
+def _allowed_orders(game_state, orders, rejected):
+    # retreats and adjustments: only the listed options count
+    board = game_state.board
+    allowed = {order for options in game_state.legal_orders().values()
+               for order in options}
+    by_unit = {order.location: order.power for order in allowed}
+    kept = []
+    for order in orders:
+        if not order.power:
+            order = order._replace(power=by_unit.get(order.location, ""))
+        if order in allowed:
+            kept.append(order)
+        else:
+            rejected.append(render_order(order, board))
+    return kept
+
+
+def replay(records, variant="standard"):
+    """
+    Replay (line number, record) pairs as yielded by read_jsonl,
+    yielding a ReplayStep per phase played. Raises ValueError if a
+    record doesn't fit its game.
+    """
+    game_state = None
+    game_id = None
+    for number, record in records:
+        if game_state is None or record.get("game_id", game_id) != game_id:
+            game_id = record.get("game_id", game_id)
+            game_state = GameState(game_id, 0,
+                                   variant=record.get("variant", variant))
+        entries = record.get("orders", ())
+        if "phase" in record or "year" in record:
+            try:
+                phase = Phase[record.get("phase", game_state.phase.name)]
+            except KeyError:
+                raise ValueError(f"line {number}: unknown phase "
+                                 f"{record['phase']!r}") from None
+            year = record.get("year", game_state.year)
+            if (phase, year) != (game_state.phase, game_state.year):
+                if phase not in MOVEMENT_PHASES and not entries:
+                    continue
+                raise ValueError(f"line {number}: game {game_id} is in "
+                                 f"{game_state.phase} {game_state.year}, "
+                                 f"not {phase} {year}")
+        orders, rejected = _parse_orders(entries, game_state.board)
+        phase, year = game_state.phase, game_state.year
+        if phase in MOVEMENT_PHASES:
+            orders = _movement_orders(game_state, orders, rejected)
+        else:
+            orders = _allowed_orders(game_state, orders, rejected)
+        resolution = game_state.process(orders)
+        game_state.turn += 1
+        yield ReplayStep(game_id, year, phase, orders, rejected, resolution,
+                         game_state)
+
+
+def replay_file(path, variant="standard"):
+    """
+    replay() of a JSON lines file, "-" for stdin, read line by line.
+    """
+    if path == "-":
+        yield from replay(read_jsonl(sys.stdin), variant)
+        return
+    with open(path, "r") as f:
+        yield from replay(read_jsonl(f), variant)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "-"
+    games = phases = rejected = 0
+    last = object()
+    for step in replay_file(path):
+        if step.game_id != last:
+            games += 1
+            last = step.game_id
+        phases += 1
+        rejected += len(step.rejected)
+        if step.rejected:
+            print(f"game {step.game_id} {step.phase} {step.year}: rejected "
+                  f"{', '.join(step.rejected)}", file=sys.stderr)
+    print(f"{games} games, {phases} phases, {rejected} rejected orders")
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+
+"""
+Order search for a single power.
+
+    python search.py [power] [max_nodes]
+
+The other powers are assumed to hold. Starting from the best ranked
+order of each unit, the search repeatedly tries the alternatives of
+one unit at a time and keeps any change that improves the evaluation
+of the resulting position (hill climbing over order sets), until no
+change helps or the node or time budget runs out.
+
+    node: one candidate order set, adjudicated (see
+          adjudication_cache.py), applied to a clone of the position
+          and evaluated
+    move ordering: each unit's legal orders are ranked by a cheap
+          static score and only the best `breadth` are tried, best
+          first
+    transposition table: evaluations are stored by the Zobrist hash
+          of the resulting position (different order sets often lead
+          to the same position) and order sets already tried are not
+          adjudicated again
+"""
+import sys
+import time
+
+from typing import NamedTuple
+
+from adjudication_cache import AdjudicationCache
+from board_index import iter_bits
+from distances import UNREACHABLE, distance_tables
+from order_types import HOLD, MOVE, Order
+from phases import MOVEMENT_PHASES
+
+
+CENTRE_VALUE = 10.0
+UNIT_VALUE = 2.0
+DISLODGED_PENALTY = 5.0
+DISTANCE_PENALTY = 0.5
+
+
+class SearchResult(NamedTuple):
+    orders: list
+    score: float
+    nodes: int
+    elapsed: float
+    tt_hits: int
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+
+def evaluate(game_state, power, tables=None):
+    """
+    Score of a position for `power`: centres it owns or occupies,
+    units it keeps, and how close its units are to the centres it
+    doesn't have yet.
+    """
+    board = game_state.board
+    tables = tables or distance_tables(board)
+    owned = game_state.centre_masks.get(power, 0)
+    location_province = board.location_province
+    units = game_state.units.get(power, ())
+    for other_power, other_units in game_state.units.items():
+        for unit in other_units:
+            if unit.dislodged:
+                continue
+            province_bit = 1 << location_province[unit.location]
+            # occupied centres change hands
+            if other_power == power:
+                owned |= province_bit
+            else:
+                owned &= ~province_bit
+    owned &= board.supply_centre_mask
+    wanted = list(iter_bits(board.supply_centre_mask & ~owned))
+    score = CENTRE_VALUE * bin(owned).count("1")
+    for unit in units:
+        if unit.dislodged:
+            score -= DISLODGED_PENALTY
+            continue
+        score += UNIT_VALUE
+        if wanted:
+            if unit.type == "F":
+                row = tables.fleet[unit.location]
+            else:
+                row = tables.army[location_province[unit.location]]
+            distance = int(row[wanted].min())
+            if distance != UNREACHABLE:
+                score -= DISTANCE_PENALTY * distance
+    return score
+
+
+class OrderSearch:
+    """
+    Search for the orders of one power, see the module docstring.
+    The budget is `max_nodes` candidate order sets and/or `seconds`
+    of wall-clock time, whichever runs out first.
+    """
+
+    def __init__(self, game_state, power, max_nodes=200, seconds=None,
+                 breadth=6, cache=None):
+        self.game_state = game_state.clone()
+        self.power = power
+        self.max_nodes = max_nodes
+        self.seconds = seconds
+        self.breadth = breadth
+        self.cache = cache if cache is not None else AdjudicationCache(10_000)
+        self.board = game_state.board
+        self.tables = distance_tables(self.board)
+        self.nodes = 0
+        self.tt_hits = 0
+        self._transpositions = {}
+        self._tried = {}
+        self._deadline = None
+
+    def _wanted_distance(self, unit_type, location, wanted):
+        if not wanted:
+            return 0
+        if unit_type == "F":
+            row = self.tables.fleet[location]
+        else:
+            row = self.tables.army[self.board.location_province[location]]
+        return int(row[wanted].min())
+
+    def _rank(self, legal):
+        """
+        Move ordering: each unit's orders, most promising first.
+        """
+        board = self.board
+        location_province = board.location_province
+        owned = self.game_state.centre_masks.get(self.power, 0)
+        wanted_mask = board.supply_centre_mask & ~owned
+        wanted = list(iter_bits(wanted_mask))
+        own_provinces = {location_province[location] for location in legal}
+        ranked = {}
+        for location, orders in legal.items():
+            here = self._wanted_distance(orders[0].unit_type, location, wanted)
+            scored = []
+            for order in orders:
+                if order.kind == HOLD:
+                    score = 0.5 if wanted_mask >> location_province[location] & 1 else 0.0
+                elif order.kind == MOVE:
+                    target = location_province[order.target]
+                    score = here - self._wanted_distance(order.unit_type,
+                                                         order.target, wanted)
+                    if wanted_mask >> target & 1:
+                        score += 2.0
+                    if target in own_provinces:
+                        score -= 1.0
+                else:
+                    # helping our own units, not somebody else's
+                    mine = location_province[order.source] in own_provinces
+                    score = 0.75 if mine else -1.0
+                scored.append((-score, len(scored), order))
+            scored.sort()
+            ranked[location] = [order for _, _, order in scored[:self.breadth]]
+            if orders[0] not in ranked[location]:
+                # holding is always an option
+                ranked[location][-1] = orders[0]
+        return ranked
+
+    def _out_of_budget(self):
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return True
+        return self._deadline is not None and time.perf_counter() >= self._deadline
+
+    def _score(self, orders, others):
+        key = frozenset(orders)
+        score = self._tried.get(key)
+        if score is not None:
+            self.tt_hits += 1
+            return score
+        self.nodes += 1
+        game_state = self.game_state
+        resolution = self.cache.resolve(orders + others, self.board)
+        changes = game_state.apply(resolution)
+        score = self._transpositions.get(game_state.zobrist)
+        if score is None:
+            score = evaluate(game_state, self.power, self.tables)
+            self._transpositions[game_state.zobrist] = score
+        else:
+            self.tt_hits += 1
+        game_state.undo(changes)
+        self._tried[key] = score
+        return score
+
+    def run(self):
+        start = time.perf_counter()
+        if self.seconds is not None:
+            self._deadline = start + self.seconds
+        game_state = self.game_state
+        legal = game_state.legal_orders(self.power)
+        if not legal:
+            return SearchResult([], 0.0, 0, 0.0, 0)
+        if game_state.phase not in MOVEMENT_PHASES:
+            # retreats and adjustments aren't searched, take the first
+            # option of each unit (disband, or build an army)
+            return SearchResult([orders[0] for orders in legal.values()], 0.0,
+                                0, time.perf_counter() - start, 0)
+        others = [Order(HOLD, unit.type, unit.location, power=power)
+                  for power, units in game_state.units.items()
+                  if power != self.power for unit in units]
+        ranked = self._rank(legal)
+        locations = list(ranked)
+        current = [ranked[location][0] for location in locations]
+        best = self._score(current, others)
+        improved = True
+        while improved and not self._out_of_budget():
+            improved = False
+            for i, location in enumerate(locations):
+                for order in ranked[location]:
+                    if order == current[i]:
+                        continue
+                    if self._out_of_budget():
+                        break
+                    candidate = current[:i] + [order] + current[i + 1:]
+                    score = self._score(candidate, others)
+                    if score > best:
+                        current, best, improved = candidate, score, True
+        return SearchResult(current, best, self.nodes,
+                            time.perf_counter() - start, self.tt_hits)
+
+
+def search_orders(game_state, power, max_nodes=200, seconds=None, breadth=6,
+                  cache=None):
+    """
+    Best orders found for `power`, returns a SearchResult.
+    """
+    return OrderSearch(game_state, power, max_nodes, seconds, breadth, cache).run()
+
+
+def search_policy(game_state, power, legal, rng):
+    """
+    simulation.py policy using the search.
+    """
+    return search_orders(game_state, power).orders
+
+
+if __name__ == "__main__":
+    from game_state import GameState
+
+    power = sys.argv[1] if len(sys.argv) > 1 else "France"
+    max_nodes = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    result = search_orders(GameState(0, 0), power, max_nodes=max_nodes)
+    for order in result.orders:
+        print(order)
+    print(f"score {result.score:.1f}, {result.nodes} nodes in {result.elapsed:.3f}s "
+          f"({result.nodes_per_second:,.0f} nodes per second, "
+          f"{result.tt_hits} transposition hits)")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+"""
+Run many independent games in parallel.
+
+    python simulation.py [n_games] [processes] [seed]
+
+Each game gets its own random.Random seeded from (seed, game_id), so
+results don't depend on which worker plays a game or in which order.
+Orders come from a policy per power:
+
+    policy(game_state, power, legal, rng) -> list of orders
+
+where `legal` maps each of the power's unit locations to its legal
+orders in the current phase (see GameState.legal_orders). In
+adjustment phases builds are keyed by home centre and only the first
+orders up to the power's number of builds or disbands count, so a
+policy orders them by preference. Policies must be module level
+functions so they can be sent to worker processes.
+
+Games are played phase by phase (movement, retreats, adjustments, see
+phases.py), `max_turns` counts phases.
+
+Workers load the map once when they start (and inherit it from the
+parent where processes are forked), so games only build their units.
+"""
+import os
+import random
+import sys
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import NamedTuple
+
+from board_index import standard_board
+from game_state import GameState
+from map_cache import load_map
+from phases import MOVEMENT_PHASES, Phase
+
+
+def hold_policy(game_state, power, legal, rng):
+    return [orders[0] for orders in legal.values()]
+
+
+def random_policy(game_state, power, legal, rng):
+    orders = [rng.choice(orders) for orders in legal.values()]
+    # random builds and disbands, see the module docstring
+    rng.shuffle(orders)
+    return orders
+
+
+class GameResult(NamedTuple):
+    game_id: int
+    seed: int
+    turns: int
+    year: int
+    unit_counts: dict
+    centre_counts: dict
+    winner: str = None
+
+
+def _orders_by_power(game_state):
+    by_power = {}
+    for location, orders in game_state.legal_orders().items():
+        by_power.setdefault(orders[0].power, {})[location] = orders
+    return by_power
+
+
+def play_game(game_id, policies=None, seed=0, max_turns=20):
+    """
+    Play one game from the starting position for `max_turns` phases,
+    or until a power wins, and return its GameResult.
+    """
+    policies = policies or {}
+    rng = random.Random(f"{seed}:{game_id}")
+    game_state = GameState(game_id, 0)
+    for _ in range(max_turns):
+        movement = game_state.phase in MOVEMENT_PHASES
+        orders = []
+        for power, legal in _orders_by_power(game_state).items():
+            policy = policies.get(power, random_policy)
+            allowed = {order for options in legal.values() for order in options}
+            for order in policy(game_state, power, legal, rng):
+                if order not in allowed:
+                    if not movement or order.location not in legal:
+                        continue
+                    # illegal orders for the power's own units become holds
+                    order = legal[order.location][0]
+                orders.append(order)
+        game_state.process(orders)
+        game_state.turn += 1
+        if game_state.phase == Phase.SPRING_MOVEMENT and game_state.winner():
+            break
+    centre_counts = {power: game_state.centre_count(power)
+                     for power in game_state.board.powers}
+    return GameResult(game_id, seed, game_state.turn, game_state.year,
+                      {power: len(units) for power, units in game_state.units.items()},
+                      centre_counts, game_state.winner())
+
+
+def _init_worker():
+    # build the shared, read-only map data once per worker
+    standard_board()
+    load_map()
+
+
+def run_games(n_games, policies=None, processes=None, seed=0, max_turns=20):
+    """
+    Play games 0..n_games-1 across a process pool, yielding each
+    GameResult as soon as it finishes (not in game order). At most a
+    few games per worker are queued at a time, so memory stays flat
+    however many games are played. processes=1 plays in this process.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for game_id in range(n_games):
+            yield play_game(game_id, policies, seed, max_turns)
+        return
+    _init_worker()
+    with ProcessPoolExecutor(processes, initializer=_init_worker) as executor:
+        pending = set()
+        game_ids = iter(range(n_games))
+        while True:
+            for game_id in game_ids:
+                pending.add(executor.submit(play_game, game_id, policies,
+                                            seed, max_turns))
+                if len(pending) >= 4 * processes:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def aggregate(results):
+    """
+    Consume a stream of GameResults into totals per power:
+    {"games": n, "units": {power: mean units}, "centres": {power: mean centres}}
+    """
+    games = 0
+    units = {}
+    centres = {}
+    for result in results:
+        games += 1
+        for power, count in result.unit_counts.items():
+            units[power] = units.get(power, 0) + count
+        for power, count in result.centre_counts.items():
+            centres[power] = centres.get(power, 0) + count
+    return {"games": games,
+            "units": {power: total / games for power, total in units.items()},
+            "centres": {power: total / games for power, total in centres.items()}}
+
+
+if __name__ == "__main__":
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    start = time.perf_counter()
+    summary = aggregate(run_games(n_games, processes=processes, seed=seed))
+    elapsed = time.perf_counter() - start
+    print(f"{summary['games']} games in {elapsed:.2f}s "
+          f"({summary['games'] / elapsed:.1f} games per second)")
+    for power, units in summary["units"].items():
+        print(f"{power}: {units:.2f} units, {summary['centres'][power]:.2f} centres")
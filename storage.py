@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+
+"""
+Where games are kept.
+
+A Storage holds the turns of many games by (game_id, turn). A turn is
+the JSON-ready dict of turn_files.turn_data: units, centre owners,
+orders, year, phase and retreats, with the map named rather than
+copied. Backends:
+
+    FileStorage(directory): one JSON file per turn, as turn_files.py
+        has always written them; a GameState given no storage uses
+        FileStorage(directory)
+    MemoryStorage(): dicts in this process, for simulations and tests
+    SQLiteStorage(path): one table keyed by (game_id, turn), writes
+        batched into transactions, a small pool of connections so
+        several threads can read at once
+
+    storage = SQLiteStorage("games.db")
+    game_state = GameState(7, 0, storage=storage)
+    game_state.save(orders)
+    GameState(7, 1, storage=storage)
+
+Game ids are kept as text by SQLiteStorage, so games saved as 7 and
+"7" are the same game there.
+"""
+import contextlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+
+from phases import Phase
+from turn_files import (read_turn_data, record_from_data, turn_data,
+                        turn_file_name, write_turn_data)
+
+
+class Storage:
+    """
+    Interface of the storage backends. Subclasses implement
+    save_turn, load_turn, turns and delete_game.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def save_turn(self, game_id, turn, data):
+        """
+        Store the dict of one turn, replacing any earlier one.
+        """
+        raise NotImplementedError
+
+    def load_turn(self, game_id, turn):
+        """
+        The dict of one turn, raises KeyError if it wasn't saved.
+        """
+        raise NotImplementedError
+
+    def turns(self, game_id):
+        """
+        Saved turn numbers of a game, in order.
+        """
+        raise NotImplementedError
+
+    def delete_game(self, game_id):
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Write out anything still buffered.
+        """
+
+    def close(self):
+        self.flush()
+
+    def write(self, game_id, turn, units, centre_owners, orders, board,
+              variant="standard", year=1901, phase=Phase.SPRING_MOVEMENT,
+              retreats=None):
+        """
+        Save a position, arguments as turn_files.write_turn.
+        """
+        return self.save_turn(game_id, turn,
+                              turn_data(turn, units, centre_owners, orders,
+                                        board, variant, year, phase, retreats))
+
+    def read(self, game_id, turn):
+        """
+        TurnRecord of a saved turn.
+        """
+        return record_from_data(self.load_turn(game_id, turn))
+
+
+class FileStorage(Storage):
+    """
+    Turn files in a directory, see turn_files.py.
+    """
+
+    def __init__(self, directory="."):
+        self.directory = directory
+
+    def save_turn(self, game_id, turn, data):
+        return write_turn_data(game_id, turn, data, self.directory)
+
+    def load_turn(self, game_id, turn):
+        try:
+            return read_turn_data(game_id, turn, self.directory)
+        except FileNotFoundError:
+            raise KeyError((game_id, turn)) from None
+
+    def turns(self, game_id):
+        pattern = re.compile(
+            re.escape(f"game_id_{game_id}_game_state_turn_") + r"(\d+)\.json$")
+        found = []
+        for name in os.listdir(self.directory):
+            match = pattern.match(name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def delete_game(self, game_id):
+        for turn in self.turns(game_id):
+            os.remove(turn_file_name(game_id, turn, self.directory))
+
+
+class MemoryStorage(Storage):
+    """
+    Turns kept in dicts, lost when the process ends. The dicts are
+    stored as given and must not be changed afterwards.
+    """
+
+    def __init__(self):
+        self._games = {}
+
+    def save_turn(self, game_id, turn, data):
+        self._games.setdefault(game_id, {})[turn] = data
+
+    def load_turn(self, game_id, turn):
+        try:
+            return self._games[game_id][turn]
+        except KeyError:
+            raise KeyError((game_id, turn)) from None
+
+    def turns(self, game_id):
+        return sorted(self._games.get(game_id, ()))
+
+    def delete_game(self, game_id):
+        self._games.pop(game_id, None)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    game_id TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (game_id, turn)
+) WITHOUT ROWID
+"""
+
+
+class SQLiteStorage(Storage):
+    """
+    Turns in an SQLite database, see the module docstring.
+    Saved turns are buffered and written `batch_size` at a time in one
+    transaction; reads flush the buffer first, so they always see
+    earlier saves. Up to `pool_size` connections are opened, each used
+    by one thread at a time.
+    """
+
+    def __init__(self, path, pool_size=4, batch_size=256):
+        self.path = path
+        self.batch_size = batch_size
+        if path == ":memory:":
+            # every connection would get its own database
+            pool_size = 1
+        self._pool = queue.Queue()
+        self._connections = [self._connect() for _ in range(pool_size)]
+        for connection in self._connections:
+            self._pool.put(connection)
+        self._pending = []
+        self._lock = threading.Lock()
+        with self._connection() as connection:
+            connection.execute(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            # readers don't wait for writers
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextlib.contextmanager
+    def _connection(self):
+        connection = self._pool.get()
+        try:
+            with connection:
+                yield connection
+        finally:
+            self._pool.put(connection)
+
+    def save_turn(self, game_id, turn, data):
+        row = (str(game_id), turn, json.dumps(data, separators=(",", ":")))
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._write_pending()
+
+    def _write_pending(self):
+        # called with self._lock held, so batches are written in order
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO turns (game_id, turn, data) VALUES (?, ?, ?)",
+                rows)
+
+    def flush(self):
+        with self._lock:
+            self._write_pending()
+
+    def load_turn(self, game_id, turn):
+        self.flush()
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT data FROM turns WHERE game_id = ? AND turn = ?",
+                (str(game_id), turn)).fetchone()
+        if row is None:
+            raise KeyError((game_id, turn))
+        return json.loads(row[0])
+
+    def turns(self, game_id):
+        self.flush()
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT turn FROM turns WHERE game_id = ? ORDER BY turn",
+                (str(game_id),)).fetchall()
+        return [turn for turn, in rows]
+
+    def delete_game(self, game_id):
+        self.flush()
+        with self._connection() as connection:
+            connection.execute("DELETE FROM turns WHERE game_id = ?",
+                               (str(game_id),))
+
+    def close(self):
+        self.flush()
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
@@ -1,18 +1,42 @@
 import json
+import os
+import random
+import tempfile
 import unittest
 import pdb
 import networkx as nx
 
-from orders import order_is_valid
-from game_state import GameStateFromInputs
+import asyncio
+import io
+
+import board_data
+import distances
+import variants
+
+from adjudication_cache import AdjudicationCache, order_set_hash
+from benchmark import check_cases, load_cases
+from board_index import BoardIndex, index_for_graph, standard_board
+from concurrent.futures import ThreadPoolExecutor
+from convoys import convoy_router
+from game_host import GameHost
+from map_cache import load_map
+from order_session import OrderSession
+from order_types import Order, OrderKind, parse_order
+from phases import (Phase, resolve_adjustments, retreat_options,
+                    retreat_restrictions)
+from replay import read_jsonl, replay
+from search import evaluate, search_orders
+from storage import FileStorage, MemoryStorage, SQLiteStorage
+from orders import (Reason, legal_orders, order_is_valid, order_resolver,
+                    validate_orders)
+from game_state import GameState, GameStateFromInputs, get_orders
 from units import Army, Fleet
+from zobrist import zobrist_keys
 
 class TestOrderValidator(unittest.TestCase):
 
     def test_army_movement(self):
-        with open("map_state_turn_000.json", "r") as f:
-            g_data = json.load(f)
-        G = nx.node_link_graph(g_data)
+        G, _ = load_map()
         army = Army("France", "Par")
         game_state = GameStateFromInputs(G, [army])
         self.assertTrue(order_is_valid(army.move("Bre"), game_state))
@@ -20,9 +44,7 @@ class TestOrderValidator(unittest.TestCase):
         self.assertFalse(order_is_valid(army.move("Eng"), game_state))
 
     def test_fleet_movement(self):
-        with open("map_state_turn_000.json", "r") as f:
-            g_data = json.load(f)
-        G = nx.node_link_graph(g_data)
+        G, _ = load_map()
         fleets = [Fleet("England", "Eng"),
                   Fleet("Italy", "Rom"),
                   Fleet("Austria", "Tri"),
@@ -46,9 +68,7 @@ class TestOrderValidator(unittest.TestCase):
         self.assertFalse(order_is_valid(fleets[3].move("Bar"), game_state))
 
     def test_support(self):
-        with open("map_state_turn_000.json", "r") as f:
-            g_data = json.load(f)
-        G = nx.node_link_graph(g_data)
+        G, _ = load_map()
         units = [Army("France", "Gas"),
                  Army("France", "Mar"),
                  Army("Germany", "Sil"),
@@ -57,6 +77,952 @@ class TestOrderValidator(unittest.TestCase):
         self.assertTrue(order_is_valid(units[0].support(units[1].move("Bur")), game_state))
         self.assertFalse(order_is_valid(units[0].support(units[1].move("Pie")), game_state))
         self.assertTrue(order_is_valid(units[3].support(units[2].move("Pru")), game_state))
+        self.assertTrue(order_is_valid(units[0].support(units[1].hold()), game_state))
+        self.assertFalse(order_is_valid(units[3].support(units[2].hold()), game_state))
+
+    def test_convoy(self):
+        G, _ = load_map()
+        units = [Fleet("England", "Nth"),
+                 Fleet("England", "Lon"),
+                 Army("England", "Yor")]
+        game_state = GameStateFromInputs(G, units)
+        self.assertTrue(order_is_valid(units[0].convoy(units[2].move("Nwy")), game_state))
+        self.assertFalse(order_is_valid(units[1].convoy(units[2].move("Nwy")), game_state))
+
+    def test_order_strings(self):
+        G, _ = load_map()
+        game_state = GameStateFromInputs(G, [])
+        self.assertTrue(order_is_valid("A Par-Bre", game_state))
+        self.assertFalse(order_is_valid("A Par-Mar", game_state))
+        self.assertTrue(order_is_valid("F StP_SC-Bot", game_state))
+        self.assertFalse(order_is_valid("A Par-Atlantis", game_state))
+
+    def test_support_convoyed_move(self):
+        G, _ = load_map()
+        units = [Army("England", "Lon"), Fleet("England", "Nth"), Fleet("Germany", "Hel")]
+        game_state = GameStateFromInputs(G, units)
+        self.assertTrue(order_is_valid("F Nth S A Lon-Hol", game_state))
+        self.assertFalse(order_is_valid("F Nth S A Lon-Bre", game_state))
+        legal = legal_orders(units, game_state.board)
+        for orders in legal.values():
+            for order in orders:
+                self.assertTrue(order_is_valid(order, game_state), str(order))
+
+    def test_batch_reasons(self):
+        G, _ = load_map()
+        game_state = GameStateFromInputs(G, [])
+        orders = ["A Par-Bre", "A Par-Mar", "F StP_SC-Bar", "F Rom-Apu",
+                  "A Pic-Eng", "F Bur-Par", "F Lon C A Yor-Nwy",
+                  "A Nth C A Yor-Nwy", "A Par-Atlantis", "A Par-Bre",
+                  parse_order("A Gas S A Mar-Bur"), "F StP_NC C A Mos-Fin"]
+        verdicts, reasons = validate_orders(orders, game_state)
+        self.assertEqual(list(reasons),
+                         [Reason.VALID, Reason.NOT_ADJACENT, Reason.WRONG_COAST,
+                          Reason.LAND_ONLY_BORDER, Reason.WRONG_TERRAIN,
+                          Reason.WRONG_TERRAIN, Reason.CONVOY_NOT_WATER,
+                          Reason.WRONG_UNIT_TYPE, Reason.UNKNOWN_ORDER,
+                          Reason.VALID, Reason.VALID, Reason.CONVOY_NOT_WATER])
+        self.assertEqual(list(verdicts),
+                         [order_is_valid(order, game_state) for order in orders])
+
+    def test_convoy_routes(self):
+        G, _ = load_map()
+        units = [Army("England", "Lon"), Fleet("England", "Nth"),
+                 Fleet("England", "Nrg"), Army("France", "Bre")]
+        game_state = GameStateFromInputs(G, units)
+        self.assertTrue(order_is_valid(units[0].move("Nwy"), game_state))
+        self.assertTrue(order_is_valid(units[0].move("Cly"), game_state))
+        self.assertTrue(order_is_valid(units[2].convoy(units[0].move("Cly")), game_state))
+        # no fleet links Brest to the north
+        self.assertFalse(order_is_valid(units[3].move("Nwy"), game_state))
+        self.assertFalse(order_is_valid(units[1].convoy(units[3].move("Nwy")), game_state))
+        _, reasons = validate_orders([units[3].move("Lon"), units[0].move("Mar")],
+                                     game_state)
+        self.assertEqual(list(reasons), [Reason.NO_CONVOY_ROUTE, Reason.NO_CONVOY_ROUTE])
+
+class TestOrderTypes(unittest.TestCase):
+
+    def test_round_trip(self):
+        for text in ["F Lon Holds", "A Par-Bur", "A Par S A Mar-Bur",
+                     "A Par S A Mar", "F Bla C A Ank-Sev", "F StP_SC-Bot"]:
+            self.assertEqual(str(parse_order(text)), text)
+
+    def test_unit_orders(self):
+        army = Army("France", "Par")
+        fleet = Fleet("Russia", "StP", coast="south")
+        order = army.move("Bur")
+        self.assertIsInstance(order, Order)
+        self.assertEqual(order.kind, OrderKind.MOVE)
+        self.assertEqual(order.power, "France")
+        self.assertEqual(str(order), "A Par-Bur")
+        self.assertEqual(str(fleet.hold()), "F StP_SC Holds")
+        self.assertEqual(str(Army("France", "Mar").support(army.hold())), "A Mar S A Par")
+        with self.assertRaises(ValueError):
+            parse_order("A Par to Bur")
+
+class TestUnits(unittest.TestCase):
+
+    def test_slots(self):
+        army = Army("France", "Par")
+        fleet = Fleet("Russia", "StP", coast="north")
+        self.assertFalse(hasattr(army, "__dict__"))
+        self.assertEqual(fleet.current_province, "StP_NC")
+        self.assertIs(fleet.current_province, standard_board().location_names[fleet.location])
+        self.assertEqual(army.allowed_province_types, ("inland", "coastal"))
+        with self.assertRaises(KeyError):
+            Fleet("England", "Lon", coast="south")
+
+    def test_copy(self):
+        army = Army("France", "Par")
+        moved = army.copy(location=standard_board().location_ids["Bur"])
+        self.assertIsInstance(moved, Army)
+        self.assertEqual(army.current_province, "Par")
+        self.assertEqual(moved.current_province, "Bur")
+        self.assertEqual(moved.home_power, "France")
+        self.assertTrue(army.copy(dislodged=True).dislodged)
+
+class TestBoardIndex(unittest.TestCase):
+
+    def test_index_matches_graph(self):
+        G, _ = load_map()
+        board = index_for_graph(G)
+        self.assertIs(board, index_for_graph(G))
+        self.assertEqual(len(board.province_names), G.number_of_nodes())
+        for province in G:
+            province_id = board.province_ids[province]
+            neighbours = {board.province_names[i] for i in range(len(board.province_names))
+                          if board.is_adjacent(province_id, i)}
+            self.assertEqual(neighbours, set(G[province]))
+
+    def test_coasts(self):
+        G, _ = load_map()
+        board = BoardIndex.from_graph(G)
+        ids = board.location_ids
+        self.assertIn("Bul_NC", ids)
+        self.assertTrue(board.can_move("F", ids["Con"], ids["Bul_SC"]))
+        self.assertTrue(board.can_move("F", ids["Spa_NC"], ids["Mid"]))
+        self.assertFalse(board.can_move("F", ids["Spa_NC"], ids["Wes"]))
+        self.assertFalse(board.can_move("F", ids["StP"], ids["Bot"]))
+        # armies ignore coasts
+        self.assertTrue(board.can_move("A", ids["Lvn"], ids["StP"]))
+        self.assertTrue(board.can_reach("F", ids["Mid"], ids["Spa"]))
+        self.assertFalse(board.can_move("A", ids["Mar"], ids["Swi"]))
+
+    def test_light_map_data(self):
+        import subprocess
+        import sys
+        self.assertEqual(BoardIndex.from_graph(board_data.make_graph()).fingerprint,
+                         standard_board().fingerprint)
+        # the map graph doesn't need the drawing libraries
+        heavy = ("geopandas", "matplotlib", "PIL", "shapely", "numpy")
+        loaded = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, board_graph; "
+             f"print([m for m in {heavy!r} if m in sys.modules])"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True).stdout
+        self.assertEqual(loaded.strip(), "[]")
+
+class TestLegalOrders(unittest.TestCase):
+
+    def test_matches_validator(self):
+        game_state = GameState(0, 0)
+        names = game_state.board.location_names
+        legal = game_state.legal_orders()
+        self.assertEqual(len(legal), 22)
+        for power_units in game_state.units.values():
+            for unit in power_units:
+                orders = legal[unit.location]
+                for order in orders:
+                    self.assertTrue(order_is_valid(order, game_state), str(order))
+                probed = {unit.move(name) for name in names
+                          if order_is_valid(unit.move(name), game_state)}
+                self.assertEqual(probed, {o for o in orders if o.kind == OrderKind.MOVE})
+
+    def test_convoys(self):
+        board = standard_board()
+        units = [Army("England", "Lon"), Fleet("England", "Nth"), Fleet("France", "Eng")]
+        legal = legal_orders(units, board, "England")
+        self.assertEqual(set(legal), {units[0].location, units[1].location})
+        self.assertIn(units[0].move("Nwy"), legal[units[0].location])
+        self.assertIn(units[0].move("Bre"), legal[units[0].location])
+        self.assertIn(units[1].convoy(units[0].move("Bre")), legal[units[1].location])
+        self.assertNotIn(units[1].convoy(units[0].move("Mar")), legal[units[1].location])
+
+class TestOrderSession(unittest.TestCase):
+
+    def test_edits(self):
+        G, _ = load_map()
+        units = [Army("England", "Lon"), Fleet("England", "Nth"),
+                 Army("France", "Gas"), Army("France", "Mar"),
+                 Fleet("Russia", "StP", coast="south")]
+        session = OrderSession(GameStateFromInputs(G, units))
+        self.assertEqual(session.problems(), {})
+        # matched against the hold the unit starts with
+        session.set_order(units[2].support(units[3].hold()))
+        self.assertTrue(session.is_matched(units[2].location))
+        rechecked = session.set_order("A Mar-Bur")
+        self.assertEqual(rechecked, {units[2].location, units[3].location})
+        self.assertFalse(session.is_matched(units[2].location))
+        session.set_order(units[2].support(units[3].move("Bur")))
+        self.assertTrue(session.is_matched(units[2].location))
+        session.set_order(units[0].move("Nwy"))
+        self.assertTrue(session.is_valid(units[0].location))
+        self.assertFalse(session.is_matched(units[0].location))
+        session.set_order(units[1].convoy(units[0].move("Nwy")))
+        self.assertTrue(session.is_matched(units[0].location))
+        self.assertTrue(session.is_matched(units[1].location))
+        session.set_order("A Mar-Pie")
+        self.assertEqual(session.problems(), {units[2].location: (Reason.VALID, False)})
+        # the coast may be left out
+        session.set_order("F StP-Bot")
+        self.assertTrue(session.is_valid(units[4].location))
+        session.set_order("A StP-Mos")
+        self.assertEqual(session.reason(units[4].location), Reason.WRONG_UNIT_TYPE)
+        with self.assertRaises(ValueError):
+            session.set_order("A Par-Bur")
+
+class TestConvoyRouter(unittest.TestCase):
+
+    def test_routes(self):
+        board = standard_board()
+        router = convoy_router(board)
+        p = board.province_ids
+        # the Baltic and Bothnia are cut off from the other seas
+        self.assertEqual(len(router.water_bodies), 2)
+        fleets = sum(1 << p[name] for name in ("Mid", "Eng", "Nth", "Ska"))
+        self.assertEqual(router.route(fleets, p["Bre"], p["Den"]),
+                         (p["Eng"], p["Nth"]))
+        self.assertEqual(router.route(fleets, p["Bre"], p["Bre"]), ())
+        self.assertTrue(router.can_convoy(fleets, p["Por"], p["Swe"]))
+        self.assertFalse(router.can_convoy(fleets, p["Por"], p["Nap"]))
+        destinations = router.army_destinations(fleets, 1 << p["Lon"] | 1 << p["Mun"])
+        self.assertEqual(destinations[p["Mun"]], 0)
+        self.assertTrue(destinations[p["Lon"]] >> p["Nwy"] & 1)
+        self.assertEqual(destinations[p["Lon"]], router.destinations(fleets, p["Lon"]))
+        # moving one fleet splits the chain
+        fleets ^= 1 << p["Eng"] | 1 << p["Iri"]
+        self.assertFalse(router.can_convoy(fleets, p["Bre"], p["Den"]))
+
+class TestMapCache(unittest.TestCase):
+
+    def test_shared_graph(self):
+        G, board = load_map()
+        self.assertIs(load_map()[0], G)
+        self.assertIs(GameState(0, 0).G, G)
+        self.assertIs(board, standard_board())
+        self.assertTrue(nx.is_frozen(G))
+
+    def test_reload_on_change(self):
+        import map_cache
+
+        with open("map_state_turn_000.json", "r") as f:
+            g_data = json.load(f)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "map.json")
+            with open(path, "w") as f:
+                json.dump(g_data, f)
+            map_cache.MAP_FILES["test"] = path
+            try:
+                G, board = load_map("test")
+                self.assertEqual(board.fingerprint, standard_board().fingerprint)
+                g_data["links"] = g_data["links"][1:]
+                with open(path, "w") as f:
+                    json.dump(g_data, f)
+                os.utime(path, ns=(0, 0))
+                G_changed, board_changed = load_map("test")
+                self.assertIsNot(G_changed, G)
+                self.assertEqual(G_changed.number_of_edges(), G.number_of_edges() - 1)
+                self.assertNotEqual(board_changed.fingerprint, board.fingerprint)
+            finally:
+                del map_cache.MAP_FILES["test"]
+                map_cache.clear_cache()
+
+class TestVariants(unittest.TestCase):
+
+    def test_standard(self):
+        variant = variants.load_variant("standard")
+        self.assertEqual(variant.board.fingerprint, standard_board().fingerprint)
+        units = variant.initial_units()
+        self.assertEqual(sum(len(power_units) for power_units in units.values()), 22)
+        self.assertEqual(repr(units["Russia"][-1]), "Fleet at StP_SC")
+        self.assertEqual({power: [unit.to_output() for unit in power_units]
+                          for power, power_units in GameState(0, 0).units.items()},
+                         {power: [unit.to_output() for unit in power_units]
+                          for power, power_units in units.items()})
+
+    def test_compiled_cache(self):
+        with open(variants.variant_file("standard"), "r") as f:
+            data = json.load(f)
+        data["name"] = "small"
+        data["starting_units"] = data["starting_units"][:3]
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "small.json"), "w") as f:
+                json.dump(data, f)
+            variant = variants.load_variant("small", tmp, tmp)
+            self.assertIs(variants.load_variant("small", tmp, tmp), variant)
+            self.assertEqual(len([name for name in os.listdir(tmp)
+                                  if name.endswith(".pickle")]), 1)
+            variants.clear_cache()
+            loaded = variants.load_variant("small", tmp, tmp)
+            self.assertIsNot(loaded, variant)
+            self.assertEqual(loaded.board.fingerprint, variant.board.fingerprint)
+            self.assertEqual(len(loaded.initial_units()["Austria"]), 3)
+
+    def test_other_map(self):
+        import map_cache
+
+        with open(variants.variant_file("standard"), "r") as f:
+            data = json.load(f)
+        # a province sorted before every other one shifts every id
+        data["provinces"]["AAA"] = {"long_name": "Aaa", "type": "inland",
+                                    "home_power": "Neutral", "supply_centre": False}
+        data["borders"].append(["AAA", "Par"])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "extra.json")
+            with open(path, "w") as f:
+                json.dump(data, f)
+            variants.VARIANT_FILES["extra"] = path
+            try:
+                # compiled into tmp, later loads reuse the process cache
+                variants.load_variant("extra", cache_directory=tmp)
+                storage = MemoryStorage()
+                game_state = GameState(0, 0, variant="extra", storage=storage)
+                paris = game_state.units["France"][0]
+                self.assertEqual(repr(paris), "Army at Par")
+                self.assertIn(paris.move("AAA"), game_state.legal_orders()[paris.location])
+                game_state.process([paris.move("AAA")])
+                game_state.save([paris.move("AAA")])
+                self.assertEqual(storage.load_turn(0, 0)["orders"], [["France", "A Par-AAA"]])
+                loaded = GameState(0, 1, storage=storage)
+                self.assertIs(loaded.board, game_state.board)
+                self.assertEqual(repr(loaded.units["France"][0]), "Army at AAA")
+                fleet = game_state.units["Russia"][-1]
+                self.assertEqual(repr(fleet), "Fleet at StP_SC")
+                self.assertEqual(order_set_hash([fleet.hold()], game_state.board),
+                                 order_set_hash([fleet.hold()], game_state.board))
+            finally:
+                del variants.VARIANT_FILES["extra"]
+                variants.clear_cache()
+                map_cache.clear_cache()
+
+    def test_bad_description(self):
+        with open(variants.variant_file("standard"), "rb") as f:
+            data = json.load(f)
+        data["borders"].append(["Par", "Nowhere"])
+        with self.assertRaises(ValueError):
+            variants.compile_variant(json.dumps(data), "bad")
+        data["borders"].pop()
+        data["starting_units"].append(["France", "F", "Par"])
+        with self.assertRaises(ValueError):
+            variants.compile_variant(json.dumps(data), "bad")
+
+class TestReplay(unittest.TestCase):
+
+    def test_replay(self):
+        log = io.StringIO("\n".join([
+            '{"game_id": 1, "year": 1901, "phase": "SPRING_MOVEMENT", '
+            '"orders": [["France", "A Par-Bur"], "F Bre-Mid", "A Mar-Mun", '
+            '["Germany", "A Mun-Bur"], "A Nowhere-Par"]}',
+            '',
+            '{"game_id": 1, "phase": "SPRING_RETREATS", "orders": []}',
+            '{"game_id": 1, "orders": ["A Par-Bur"]}',
+            '{"game_id": 2, "orders": ["F Lon-Nth"]}',
+        ]))
+        steps = replay(read_jsonl(log))
+        step = next(steps)
+        self.assertEqual((step.game_id, step.year, step.phase),
+                         (1, 1901, Phase.SPRING_MOVEMENT))
+        self.assertEqual(step.rejected, ["A Nowhere-Par", "A Mar-Mun"])
+        self.assertEqual(len(step.orders), 22)
+        # standoff in Bur
+        board = step.game_state.board
+        self.assertIn("Par", [unit.current_province
+                              for unit in step.game_state.units["France"]])
+        self.assertEqual(step.game_state.phase, Phase.FALL_MOVEMENT)
+        step = next(steps)
+        self.assertEqual(step.phase, Phase.FALL_MOVEMENT)
+        self.assertEqual(step.rejected, [])
+        self.assertIn(board.province_ids["Bur"], {
+            board.location_province[unit.location]
+            for unit in step.game_state.units["France"]})
+        step = next(steps)
+        self.assertEqual((step.game_id, step.game_state.turn), (2, 1))
+        self.assertEqual(list(steps), [])
+
+    def test_bad_records(self):
+        with self.assertRaises(ValueError):
+            list(read_jsonl(io.StringIO('{"orders": []}\n[1, 2]\n')))
+        log = io.StringIO('{"year": 1902, "orders": ["A Par-Bur"]}\n')
+        with self.assertRaises(ValueError):
+            list(replay(read_jsonl(log)))
+
+class TestGameHost(unittest.TestCase):
+
+    def test_all_ready(self):
+        async def play():
+            host = GameHost(executor=ThreadPoolExecutor(2))
+            for game_id in range(3):
+                host.create_game(game_id)
+            reasons = await host.submit(0, "France", ["A Par-Bur", "A Mar-Mun",
+                                                      "A Ber-Kie", "Nonsense"])
+            self.assertEqual(list(reasons.values()),
+                             [Reason.VALID, Reason.NOT_ADJACENT,
+                              Reason.UNKNOWN_ORDER, Reason.UNKNOWN_ORDER])
+            powers = standard_board().powers
+            # every game's powers submit concurrently
+            await asyncio.gather(*(host.submit(game_id, power, [], ready=True)
+                                   for game_id in range(3) for power in powers))
+            for game_id in range(3):
+                self.assertEqual(host.game_state(game_id).phase,
+                                 Phase.FALL_MOVEMENT)
+            france = host.game_state(0).units["France"]
+            self.assertEqual(sorted(unit.current_province for unit in france),
+                             ["Bre", "Bur", "Mar"])
+            await host.close()
+        asyncio.run(play())
+
+    def test_deadline(self):
+        async def play():
+            host = GameHost(deadline=0.01, executor=ThreadPoolExecutor(1))
+            host.create_game("g")
+            await host.submit("g", "England", ["F Lon-Nth"], ready=True)
+            game_state = await host.next_phase("g")
+            self.assertEqual(game_state.phase, Phase.FALL_MOVEMENT)
+            self.assertEqual(game_state.turn, 1)
+            self.assertIn("Nth", [unit.current_province
+                                  for unit in game_state.units["England"]])
+            await host.close()
+        asyncio.run(play())
+
+    def test_failed_adjudication(self):
+        class BrokenOnce(ThreadPoolExecutor):
+            broken = True
+
+            def submit(self, fn, *args, **kwargs):
+                if self.broken:
+                    self.broken = False
+                    raise RuntimeError("broken pool")
+                return super().submit(fn, *args, **kwargs)
+
+        async def play():
+            host = GameHost(executor=BrokenOnce(1))
+            host.create_game("g")
+            waiter = asyncio.ensure_future(host.next_phase("g"))
+            await asyncio.sleep(0)
+            for power in standard_board().powers:
+                await host.submit("g", power, [], ready=True)
+            with self.assertRaises(RuntimeError):
+                await waiter
+            self.assertEqual(host.game_state("g").turn, 0)
+            # the phase is still open and processed on the next try
+            waiter = asyncio.ensure_future(host.next_phase("g"))
+            await asyncio.sleep(0)
+            await host.submit("g", "France", ["A Par-Bur"], ready=True)
+            self.assertEqual((await waiter).phase, Phase.FALL_MOVEMENT)
+            await host.close()
+        asyncio.run(play())
+
+class TestTurnFiles(unittest.TestCase):
+
+    def test_save_and_load(self):
+        game_state = GameState(0, 0)
+        france = game_state.units["France"]
+        orders = [france[0].move("Bur"), france[1].hold(), france[2].move("Mid")]
+        game_state.apply(order_resolver(orders))
+        game_state.set_centre_owner(game_state.board.province_ids["Spa"], "France")
+        with tempfile.TemporaryDirectory() as tmp:
+            game_state.storage = FileStorage(tmp)
+            path = game_state.save(orders)
+            with open(path, "r") as f:
+                data = json.load(f)
+            self.assertNotIn("game_map", data)
+            self.assertLess(os.path.getsize(path), 4000)
+            next_turn = GameState(0, 1, directory=tmp)
+            self.assertEqual(next_turn.centre_owners, game_state.centre_owners)
+            self.assertEqual([u.current_province for u in next_turn.units["France"]],
+                             ["Bur", "Mar", "Mid"])
+            self.assertIn("StP_SC", [u.current_province for u in next_turn.units["Russia"]])
+            from turn_files import read_turn
+            self.assertEqual(read_turn(0, 0, tmp).orders, orders)
+
+    def test_legacy_file(self):
+        with open("map_state_turn_000.json", "r") as f:
+            g_data = json.load(f)
+        units = [Army("France", "Bur").to_output(), Fleet("Russia", "StP", coast="north").to_output()]
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "game_id_7_game_state_turn_004.json"), "w") as f:
+                json.dump({"game_map": g_data, "units": units}, f)
+            game_state = GameState(7, 5, directory=tmp)
+        self.assertIs(game_state.G, load_map()[0])
+        self.assertEqual(game_state.units["France"][0].current_province, "Bur")
+        self.assertEqual(len(game_state.centre_owners), 22)
+
+class TestStorage(unittest.TestCase):
+
+    def check_backend(self, storage):
+        game_state = GameState(3, 0, storage=storage)
+        france = game_state.units["France"]
+        orders = [france[0].move("Bur"), france[1].hold()]
+        game_state.process(orders)
+        game_state.save(orders)
+        game_state.turn = 1
+        game_state.save()
+        self.assertEqual(storage.turns(3), [0, 1])
+        self.assertEqual(storage.read(3, 0).orders, orders)
+        loaded = GameState(3, 1, storage=storage)
+        self.assertEqual(loaded.phase, Phase.FALL_MOVEMENT)
+        self.assertIn("Bur", [unit.current_province for unit in loaded.units["France"]])
+        with self.assertRaises(KeyError):
+            storage.load_turn(3, 5)
+        storage.delete_game(3)
+        self.assertEqual(storage.turns(3), [])
+
+    def test_backends(self):
+        self.check_backend(MemoryStorage())
+        with SQLiteStorage(":memory:") as storage:
+            self.check_backend(storage)
+        with tempfile.TemporaryDirectory() as tmp:
+            self.check_backend(FileStorage(tmp))
+
+    def test_sqlite_batches(self):
+        game_state = GameState(0, 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "games.db")
+            with SQLiteStorage(path, pool_size=2, batch_size=2) as storage:
+                for game_id in range(3):
+                    game_state.game_id = game_id
+                    storage.write(game_id, 0, game_state.units,
+                                  game_state.centre_owners, [], game_state.board)
+                self.assertEqual(len(storage._pending), 1)
+            with SQLiteStorage(path) as storage:
+                self.assertEqual([storage.turns(game_id) for game_id in range(3)],
+                                 [[0], [0], [0]])
+                self.assertEqual(storage.read("2", 0).centre_owners,
+                                 game_state.centre_owners)
+
+class TestGameArchive(unittest.TestCase):
+
+    def test_append_and_seek(self):
+        from game_archive import GameArchive
+
+        game_state = GameState(0, 0)
+        france = game_state.units["France"]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "game_0.dipa")
+            with GameArchive(path) as archive:
+                archive.append(game_state)
+                game_state.apply(order_resolver([france[0].move("Bur")]))
+                game_state.units["Russia"][2] = game_state.units["Russia"][2].copy(dislodged=True)
+                game_state.units["Austria"][1] = game_state.units["Austria"][1].copy(dislodged=True)
+                game_state.set_centre_owner(game_state.board.province_ids["Par"], None)
+                province_ids = game_state.board.province_ids
+                standoff = 1 << province_ids["Gal"]
+                retreats = {game_state.units["Russia"][2].location: standoff | 1 << province_ids["Pru"],
+                            game_state.units["Austria"][1].location: standoff}
+                game_state.retreats = dict(retreats)
+                game_state.phase = Phase.SPRING_RETREATS
+                game_state.turn = 1
+                archive.append(game_state)
+                self.assertEqual(len(archive), 2)
+                self.assertEqual(archive.turn(0).units["France"][0].current_province, "Par")
+            with GameArchive(path) as archive:
+                turn = archive.turn(1)
+                self.assertEqual(turn.turn, 1)
+                self.assertEqual((turn.year, turn.phase), (1901, Phase.SPRING_RETREATS))
+                self.assertEqual(turn.retreats, retreats)
+                self.assertEqual(archive.turn(0).retreats, {})
+                self.assertEqual([u.current_province for u in turn.units["France"]],
+                                 ["Bur", "Mar", "Bre"])
+                self.assertEqual(turn.units["Russia"][3].current_province, "StP_SC")
+                self.assertTrue(turn.units["Russia"][2].dislodged)
+                self.assertEqual(turn.centre_owners, game_state.centre_owners)
+                self.assertEqual([t.turn for t in archive], [0, 1])
+                with self.assertRaises(KeyError):
+                    archive.turn(2)
+
+class TestSimulation(unittest.TestCase):
+
+    def test_seeded_games(self):
+        from simulation import hold_policy, play_game, run_games
+
+        serial = sorted(run_games(4, processes=1, seed=3, max_turns=4))
+        parallel = sorted(run_games(4, processes=2, seed=3, max_turns=4))
+        self.assertEqual(serial, parallel)
+        self.assertEqual([r.game_id for r in serial], [0, 1, 2, 3])
+        held = play_game(0, {power: hold_policy for power in standard_board().powers}, max_turns=2)
+        self.assertEqual(held.turns, 2)
+        self.assertEqual(sum(held.unit_counts.values()), 22)
+
+    def test_bad_policy_orders(self):
+        from simulation import play_game
+
+        def policy(game_state, power, legal, rng):
+            board = game_state.board
+            # another power's unit, and an empty province
+            return [Order(OrderKind.MOVE, "A", board.location_ids["Par"],
+                          board.location_ids["Pic"], power=power),
+                    Order(OrderKind.MOVE, "A", board.location_ids["Boh"],
+                          board.location_ids["Lon"], power=power)]
+
+        result = play_game(0, {power: policy for power in standard_board().powers}, max_turns=2)
+        self.assertEqual(result.turns, 2)
+        self.assertEqual(sum(result.unit_counts.values()), 22)
+
+class TestGameStateSnapshots(unittest.TestCase):
+
+    def test_clone_apply_undo(self):
+        game_state = GameState(0, 0)
+        france = game_state.units["France"]
+        orders = [france[0].move("Bur"), france[1].move("Spa"), france[2].hold()]
+        clone = game_state.clone()
+        self.assertIs(clone.G, game_state.G)
+        self.assertIs(clone.units["France"], france)
+
+        changes = clone.apply(order_resolver(orders))
+        self.assertEqual(len(changes), 2)
+        self.assertEqual([u.current_province for u in clone.units["France"]],
+                         ["Bur", "Spa", "Bre"])
+        self.assertEqual([u.current_province for u in game_state.units["France"]],
+                         ["Par", "Mar", "Bre"])
+        # only the changed power's units were copied
+        self.assertIs(clone.units["England"], game_state.units["England"])
+
+        clone.undo(changes)
+        self.assertEqual([u.current_province for u in clone.units["France"]],
+                         ["Par", "Mar", "Bre"])
+
+    def test_apply_dislodged(self):
+        game_state = GameState(0, 0)
+        german = Army("Germany", "Bur")
+        game_state.units["Germany"].append(german)
+        paris, marseilles, _ = game_state.units["France"]
+        orders = [german.hold(), paris.move("Bur"), marseilles.support(paris.move("Bur"))]
+        game_state.apply(order_resolver(orders))
+        self.assertTrue(game_state.units["Germany"][-1].dislodged)
+        self.assertEqual(game_state.units["France"][0].current_province, "Bur")
+        # units are replaced, never changed in place
+        self.assertFalse(german.dislodged)
+        self.assertEqual(paris.current_province, "Par")
+
+    def test_apply_follows_resolution(self):
+        game_state = GameState(0, 0)
+        berlin, munich, kiel = game_state.units["Germany"]
+        ankara, constantinople, smyrna = game_state.units["Turkey"]
+        # into a vacated province, and round in a circle
+        orders = [berlin.move("Kie"), kiel.move("Hol"), munich.hold(),
+                  ankara.move("Con"), constantinople.move("Smy"), smyrna.move("Ank")]
+        resolution = order_resolver(orders)
+        self.assertTrue(all(succeeded for _, succeeded in resolution))
+        game_state.apply(resolution)
+        self.assertEqual([repr(u) for u in game_state.units["Germany"]],
+                         ["Army at Kie", "Army at Mun", "Fleet at Hol"])
+        self.assertEqual([repr(u) for u in game_state.units["Turkey"]],
+                         ["Fleet at Con", "Army at Smy", "Army at Ank"])
+
+    def test_zobrist(self):
+        game_state = GameState(0, 0)
+        keys = zobrist_keys(game_state.board)
+        def rehash(state):
+            return keys.position((u for units in state.units.values() for u in units),
+                                 state.centre_owners)
+        start = game_state.zobrist
+        self.assertEqual(start, rehash(game_state))
+        self.assertEqual(start, GameState(0, 0).zobrist)
+        paris, marseilles, _ = game_state.units["France"]
+        # the same position reached by different moves
+        one, two = game_state.clone(), game_state.clone()
+        one.apply(order_resolver([paris.move("Bur"), marseilles.move("Spa")]))
+        two.apply(order_resolver([paris.move("Bur")]))
+        two.apply(order_resolver([marseilles.move("Spa")]))
+        self.assertEqual(one.zobrist, two.zobrist)
+        self.assertEqual(one.zobrist, rehash(one))
+        self.assertNotEqual(one.zobrist, start)
+        changes = two.apply(order_resolver([two.units["France"][0].move("Pic")]))
+        self.assertNotEqual(two.zobrist, one.zobrist)
+        two.undo(changes)
+        self.assertEqual(two.zobrist, one.zobrist)
+        board = game_state.board
+        self.assertEqual(one.set_centre_owner(board.province_ids["Spa"], "France"), None)
+        self.assertEqual(one.zobrist, rehash(one))
+        self.assertNotIn(board.province_ids["Spa"], game_state.centre_owners)
+        self.assertEqual(game_state.zobrist, start)
+
+class TestSearch(unittest.TestCase):
+
+    def test_search(self):
+        game_state = GameState(0, 0)
+        start = game_state.zobrist
+        result = search_orders(game_state, "France", max_nodes=10)
+        self.assertLessEqual(result.nodes, 10)
+        self.assertGreater(result.nodes_per_second, 0)
+        legal = game_state.legal_orders("France")
+        self.assertEqual({order.location for order in result.orders}, set(legal))
+        for order in result.orders:
+            self.assertIn(order, legal[order.location])
+        # the searched position is left as it was
+        self.assertEqual(game_state.zobrist, start)
+        # moving beats holding at the start
+        self.assertGreater(result.score, evaluate(game_state, "France"))
+
+    def test_get_orders(self):
+        game_state = GameState(0, 0)
+        orders = get_orders(game_state, max_nodes=5)
+        self.assertEqual(len(orders), 22)
+        self.assertTrue(all(order_is_valid(order, game_state) for order in orders))
+
+class TestPhases(unittest.TestCase):
+
+    def _dislodge_burgundy(self):
+        game_state = GameState(0, 0)
+        german = Army("Germany", "Bur")
+        game_state.units["Germany"] = game_state.units["Germany"] + [german]
+        paris, marseilles, _ = game_state.units["France"]
+        game_state.process([german.hold(), paris.move("Bur"),
+                            marseilles.support(paris.move("Bur")),
+                            Army("Germany", "Mun").move("Ruh")])
+        return game_state, german
+
+    def test_read_only_centre_owners(self):
+        game_state = GameState(0, 0)
+        with self.assertRaises(TypeError):
+            game_state.centre_owners[game_state.board.province_ids["Spa"]] = "France"
+        game_state.set_centre_owner(game_state.board.province_ids["Spa"], "France")
+        self.assertEqual(len(game_state.centre_owners), 23)
+        self.assertEqual(game_state.centre_count("France"), 4)
+        units = [unit for units in game_state.units.values() for unit in units]
+        self.assertEqual(game_state.zobrist,
+                         zobrist_keys(game_state.board).position(
+                             units, game_state.centre_owners))
+
+    def test_illegal_retreat(self):
+        game_state, german = self._dislodge_burgundy()
+        # Ruhr is occupied, the unit is disbanded instead
+        game_state.process([german.move("Ruh", retreat=True)])
+        self.assertEqual(sorted(unit.current_province
+                                for unit in game_state.units["Germany"]),
+                         ["Ber", "Kie", "Ruh"])
+
+    def test_unordered_units_hold(self):
+        game_state = GameState(0, 0)
+        german = Army("Germany", "Bur")
+        game_state.units["Germany"] = game_state.units["Germany"] + [german]
+        resolution = game_state.process([game_state.units["France"][0].move("Bur")])
+        self.assertEqual(len(resolution.orders), 23)
+        self.assertIn("Par", [unit.current_province for unit in game_state.units["France"]])
+        self.assertFalse(any(unit.dislodged for unit in game_state.units["Germany"]))
+
+    def test_retreats(self):
+        game_state, german = self._dislodge_burgundy()
+        self.assertEqual(game_state.phase, Phase.SPRING_RETREATS)
+        legal = game_state.legal_orders()
+        retreats = {str(order) for order in legal[german.location]}
+        # not to Paris (the attacker's) nor Ruhr / Marseilles (occupied)
+        self.assertEqual(retreats, {"A Bur Disband", "A Bur R Bel", "A Bur R Gas",
+                                    "A Bur R Pic", "A Bur R Mun"})
+        self.assertEqual(german.move("Gas", retreat=True),
+                         parse_order("A Bur R Gas", power="Germany"))
+        game_state.process([german.move("Gas", retreat=True)])
+        self.assertEqual(game_state.phase, Phase.FALL_MOVEMENT)
+        self.assertIn("Gas", [u.current_province for u in game_state.units["Germany"]])
+        self.assertFalse(any(u.dislodged for u in game_state.units["Germany"]))
+
+    def test_year(self):
+        game_state, german = self._dislodge_burgundy()
+        game_state.process([german.disband()])
+        self.assertEqual(len(game_state.units["Germany"]), 3)
+        france = game_state.units["France"]
+        bur, mar, bre = france
+        game_state.process([bur.move("Bel"), mar.move("Spa"), bre.hold()])
+        # France took Belgium and Spain and builds in Paris and Marseilles
+        board = game_state.board
+        self.assertEqual(game_state.centre_owners[board.province_ids["Bel"]], "France")
+        self.assertEqual(game_state.phase, Phase.WINTER_ADJUSTMENTS)
+        builds = game_state.legal_orders("France")
+        self.assertEqual({board.province_names[p] for p in builds}, {"Par", "Mar"})
+        self.assertIn(Fleet("France", "Mar").build(), builds[board.province_ids["Mar"]])
+        game_state.process([Army("France", "Par").build()])
+        self.assertEqual(len(game_state.units["France"]), 4)
+        self.assertEqual((game_state.year, game_state.phase), (1902, Phase.SPRING_MOVEMENT))
+
+    def test_centre_masks(self):
+        game_state = GameState(0, 0)
+        board = game_state.board
+        self.assertEqual(game_state.centre_count("Russia"), 4)
+        self.assertEqual(game_state.centre_masks["France"], board.home_centres["France"])
+        self.assertIsNone(game_state.winner())
+        clone = game_state.clone()
+        masks = dict(clone.centre_masks)
+        # France takes every centre but Russia's
+        masks["France"] = board.supply_centre_mask & ~board.home_centres["Russia"]
+        for power in masks:
+            if power not in ("France", "Russia"):
+                masks[power] = 0
+        clone.set_centre_masks(masks)
+        self.assertEqual(clone.winner(), "France")
+        self.assertEqual(clone.centre_count("France"), 30)
+        self.assertEqual(clone.centre_owners[board.province_ids["Lon"]], "France")
+        self.assertEqual(clone.zobrist, zobrist_keys(board).position(
+            (u for units in clone.units.values() for u in units), clone.centre_owners))
+        self.assertEqual(game_state.centre_count("France"), 3)
+
+    def test_civil_disorder(self):
+        board = standard_board()
+        units = {"Russia": [Army("Russia", "Mos"), Fleet("Russia", "Nth"), Army("Russia", "Ukr")]}
+        masks = {"Russia": 1 << board.province_ids["Mos"]}
+        built, disbanded = resolve_adjustments(units, masks, [], board)
+        self.assertEqual(built, [])
+        self.assertEqual([u.current_province for u in disbanded], ["Nth", "Ukr"])
+
+    def test_saved_phase(self):
+        game_state, _ = self._dislodge_burgundy()
+        with tempfile.TemporaryDirectory() as directory:
+            game_state.storage = FileStorage(directory)
+            game_state.save()
+            loaded = GameState(0, 1, directory)
+        self.assertEqual(loaded.phase, Phase.SPRING_RETREATS)
+        self.assertEqual(loaded.retreats, game_state.retreats)
+        self.assertEqual(loaded.legal_orders(), game_state.legal_orders())
+
+class TestBoardTensor(unittest.TestCase):
+
+    def test_round_trip(self):
+        import board_tensor
+
+        game_state = GameState(0, 0)
+        tensor = game_state.to_tensor()
+        self.assertEqual(tensor.shape, (len(game_state.board.province_names),
+                                        len(board_tensor.feature_names(game_state.board))))
+        units, centre_owners = board_tensor.decode(tensor, game_state.board)
+        self.assertEqual(centre_owners, game_state.centre_owners)
+        for power, power_units in game_state.units.items():
+            self.assertEqual(sorted(u.current_province for u in units[power]),
+                             sorted(u.current_province for u in power_units))
+        self.assertIn("StP_SC", [u.current_province for u in units["Russia"]])
+
+    def test_round_trip_dislodged(self):
+        import board_tensor
+
+        game_state = GameState(0, 0)
+        russia = Army("Russia", "Boh")
+        game_state.units["Russia"].append(russia)
+        vienna = game_state.units["Austria"][0]
+        munich = game_state.units["Germany"][1]
+        game_state.process([vienna.move("Boh"), munich.support(vienna.move("Boh")),
+                            russia.hold()])
+        self.assertEqual(game_state.phase, Phase.SPRING_RETREATS)
+        units, _ = board_tensor.decode(game_state.to_tensor(), game_state.board)
+        self.assertEqual(sum(map(len, units.values())), 23)
+        for power, power_units in game_state.units.items():
+            self.assertEqual(sorted((u.current_province, u.dislodged) for u in units[power]),
+                             sorted((u.current_province, u.dislodged) for u in power_units))
+        self.assertIn(("Boh", True), [(u.current_province, u.dislodged) for u in units["Russia"]])
+        counts = board_tensor.unit_counts(game_state.to_tensor()[None], game_state.board)
+        self.assertEqual(counts.sum(), 23)
+
+    def test_batch(self):
+        import numpy as np
+        import board_tensor
+
+        game_state = GameState(0, 0)
+        moved = GameStateFromInputs(game_state.G, [Army("France", "Bur")])
+        batch = board_tensor.encode_game_states([game_state, moved], np.float32)
+        self.assertEqual(batch.dtype, np.float32)
+        counts = board_tensor.unit_counts(batch, game_state.board)
+        self.assertEqual(counts[0].tolist(), [3, 3, 3, 3, 3, 4, 3])
+        self.assertEqual(counts[1].sum(), 1)
+        self.assertEqual(board_tensor.centre_counts(batch, game_state.board)[1].sum(), 0)
+        self.assertEqual(board_tensor.occupied(batch).sum(axis=1).tolist(), [22, 1])
+
+class TestDistances(unittest.TestCase):
+
+    def test_distances(self):
+        board = standard_board()
+        tables = distances.compute_tables(board)
+        p, l = board.province_ids, board.location_ids
+        self.assertEqual(tables.army[p["Par"], p["Par"]], 0)
+        self.assertEqual(tables.army[p["Par"], p["Mos"]], 5)
+        self.assertEqual(tables.army[p["Lon"], p["Par"]], distances.UNREACHABLE)
+        self.assertEqual(tables.convoy[p["Lon"], p["Par"]], 2)
+        self.assertEqual(tables.distance("F", l["StP_SC"], p["Bot"]), 1)
+        self.assertEqual(tables.distance("F", l["StP_NC"], p["Bot"]), 3)
+        self.assertEqual(tables.fleet[p["Eng"], p["Mos"]], distances.UNREACHABLE)
+
+    def test_disk_cache(self):
+        board = standard_board()
+        with tempfile.TemporaryDirectory() as directory:
+            distances.clear_cache()
+            built = distances.distance_tables(board, directory)
+            self.assertTrue(os.path.exists(distances.cache_file(board, directory)))
+            distances.clear_cache()
+            loaded = distances.distance_tables(board, directory)
+            distances.clear_cache()
+        self.assertIsNot(built, loaded)
+        for name in ("army", "fleet", "convoy"):
+            self.assertTrue((getattr(built, name) == getattr(loaded, name)).all())
+
+class TestOrderResolver(unittest.TestCase):
+
+    def test_adjudication_cases(self):
+        self.assertEqual(check_cases(load_cases()), [])
+
+    def test_order_independent(self):
+        rng = random.Random(0)
+        for name, orders, results, dislodged in load_cases():
+            permutations = [list(range(len(orders)))[::-1]]
+            for _ in range(20):
+                permutation = list(range(len(orders)))
+                rng.shuffle(permutation)
+                permutations.append(permutation)
+            for permutation in permutations:
+                resolution = order_resolver([orders[i] for i in permutation])
+                self.assertEqual(resolution.results,
+                                 tuple(results[i] for i in permutation), name)
+                self.assertEqual(set(resolution.dislodged), dislodged, name)
+
+    def test_dislodged_attacker(self):
+        board = standard_board()
+        units = [Army("Germany", "Bur"), Army("France", "Mar"), Army("France", "Par")]
+        orders = [units[0].hold(), units[1].move("Bur"), units[2].support(units[1].move("Bur"))]
+        resolution = order_resolver(orders)
+        self.assertFalse(resolution.outcome(orders[0]))
+        self.assertEqual(resolution.dislodged, {board.location_ids["Bur"]: board.province_ids["Mar"]})
+
+    def test_contested_and_convoyed_attacker(self):
+        board = standard_board()
+        orders = [parse_order(text, board, power) for power, text in (
+            ("France", "A Par-Bur"), ("Germany", "A Mun-Bur"), ("Germany", "A Bur-Ruh"))]
+        resolution = order_resolver(orders)
+        self.assertEqual(resolution.contested, {board.province_ids["Bur"]})
+        orders = [parse_order(text, board, power) for power, text in (
+            ("England", "A Pic-Bel"), ("England", "F Eng C A Pic-Bel"),
+            ("England", "F Nth S A Pic-Bel"), ("France", "A Bel Holds"))]
+        resolution = order_resolver(orders)
+        self.assertEqual(resolution.dislodged, {board.location_ids["Bel"]: -1})
+        options = retreat_options([Army("France", "Bel").copy(dislodged=True)],
+                                  retreat_restrictions(resolution), board)
+        self.assertIn("A Bel R Pic", [str(order) for order in
+                                      options[board.location_ids["Bel"]]])
+
+class TestAdjudicationCache(unittest.TestCase):
+
+    def test_cache(self):
+        board = standard_board()
+        cases = load_cases()
+        cache = AdjudicationCache(maxsize=len(cases))
+        for name, orders, results, dislodged in cases:
+            self.assertEqual(cache.resolve(orders, board).results, results, name)
+            reordered = cache.resolve(orders[::-1], board)
+            self.assertEqual(reordered.results, results[::-1], name)
+            self.assertEqual(reordered.orders, orders[::-1], name)
+            self.assertEqual(order_set_hash(orders, board),
+                             order_set_hash(orders[::-1], board))
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses, info.evictions),
+                         (len(cases), len(cases), 0))
+        cache.resolve([Army("France", "Par").hold()], board)
+        self.assertEqual(cache.info().evictions, 1)
+        self.assertEqual(len(cache), cache.maxsize)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
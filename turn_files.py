@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+"""
+Per-turn game files.
+
+A turn file holds only what changes from turn to turn:
+
+    {"map_variant": "standard",
+     "map_fingerprint": "...",
+     "turn": 3,
+     "year": 1902,
+     "phase": "FALL_RETREATS",
+     "units": [{"type": "A", "home_power": "France", "current_province": "Bur"}, ...],
+     "supply_centres": {"Par": "France", ...},
+     "orders": [["France", "A Par-Bur"], ...],
+     "retreats": {"Bur": ["Mar", "Pic"]}}
+
+`year` and `phase` are those of the position the file holds, the one
+the next turn starts from. `retreats` lists, for each dislodged unit,
+the provinces it can't retreat to (only while retreats are pending).
+
+The map itself is not repeated: `map_variant` names a map known to
+map_cache.py and `map_fingerprint` guards against reading a game
+with a different version of that map. Older files that embed the
+whole map as `game_map` can still be read.
+"""
+import json
+import os
+
+from board_index import iter_bits
+from map_cache import load_map
+from order_types import parse_order, render_order
+from phases import Phase
+from units import unit_from_gamestate
+
+
+def turn_file_name(game_id, turn, directory="."):
+    return os.path.join(
+        directory, f"game_id_{game_id}_game_state_turn_" + f"{turn}".zfill(3) + ".json")
+
+
+class TurnRecord:
+    """
+    Contents of a turn file.
+        variant: map variant name
+        units: {power: [Unit]}
+        centre_owners: {province id: power}, None if not recorded
+        orders: orders given during the turn
+        year, phase: when the position stands, see phases.py
+        retreats: {location: bitmask of provinces it can't retreat to}
+    """
+    __slots__ = ("variant", "units", "centre_owners", "orders", "year",
+                 "phase", "retreats")
+
+    def __init__(self, variant, units, centre_owners, orders, year=1901,
+                 phase=Phase.SPRING_MOVEMENT, retreats=None):
+        self.variant = variant
+        self.units = units
+        self.centre_owners = centre_owners
+        self.orders = orders
+        self.year = year
+        self.phase = phase
+        self.retreats = retreats or {}
+
+
+def turn_data(turn, units, centre_owners, orders, board, variant="standard",
+              year=1901, phase=Phase.SPRING_MOVEMENT, retreats=None):
+    """
+    JSON-ready dict for one turn.
+    `units` is {power: [Unit]}, `orders` holds Order records or text.
+    """
+    data = {
+        "map_variant": variant,
+        "map_fingerprint": board.fingerprint,
+        "turn": turn,
+        "year": year,
+        "phase": Phase(phase).name,
+        "units": [unit.to_output() for power_units in units.values()
+                  for unit in power_units],
+        "supply_centres": {board.province_names[province]: power
+                           for province, power in sorted(centre_owners.items())},
+        "orders": [["", order] if isinstance(order, str) else
+                   [order.power, render_order(order, board)] for order in orders],
+    }
+    if retreats:
+        names = board.province_names
+        data["retreats"] = {
+            board.location_names[location]: [names[p] for p in iter_bits(blocked)]
+            for location, blocked in sorted(retreats.items())}
+    return data
+
+
+def write_turn_data(game_id, turn, data, directory="."):
+    """
+    Write the dict of turn_data to its turn file, returns the path.
+    """
+    path = turn_file_name(game_id, turn, directory)
+    with open(path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    return path
+
+
+def write_turn(game_id, turn, units, centre_owners, orders, board,
+               variant="standard", directory=".", year=1901,
+               phase=Phase.SPRING_MOVEMENT, retreats=None):
+    return write_turn_data(game_id, turn,
+                           turn_data(turn, units, centre_owners, orders, board,
+                                     variant, year, phase, retreats),
+                           directory)
+
+
+def record_from_data(data):
+    """
+    Rebuild a TurnRecord from the dict written by write_turn (or an
+    older file with an embedded map).
+    """
+    variant = data.get("map_variant", "standard")
+    _, board = load_map(variant)
+    if "map_fingerprint" in data and data["map_fingerprint"] != board.fingerprint:
+        raise ValueError(f"Turn {data.get('turn')} was saved with a different "
+                         f"version of the {variant!r} map")
+    units = {power: [] for power in board.powers}
+    for unit_desc in data["units"]:
+        unit = unit_from_gamestate(unit_desc, board)
+        units.setdefault(unit.home_power, []).append(unit)
+    centre_owners = None
+    if "supply_centres" in data:
+        centre_owners = {board.province_ids[name]: power
+                         for name, power in data["supply_centres"].items()}
+    orders = [parse_order(text, board, power)
+              for power, text in data.get("orders", ())]
+    retreats = {board.location_ids[name]: sum(1 << board.province_ids[p]
+                                              for p in blocked)
+                for name, blocked in data.get("retreats", {}).items()}
+    return TurnRecord(variant, units, centre_owners, orders,
+                      data.get("year", 1901),
+                      Phase[data.get("phase", "SPRING_MOVEMENT")], retreats)
+
+
+def read_turn_data(game_id, turn, directory="."):
+    with open(turn_file_name(game_id, turn, directory), "r") as f:
+        return json.load(f)
+
+
+def read_turn(game_id, turn, directory="."):
+    return record_from_data(read_turn_data(game_id, turn, directory))
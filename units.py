@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 
-import functools
+import sys
+
+from board_index import standard_board
+from order_types import Order, OrderKind, parse_order
 
 class Unit:
     """
@@ -10,90 +13,166 @@ class Unit:
         - where it is: `current_province`
         - what it should do:  `order`
 
-    example order outputs:
-    Hold: F London Holds
-    Move: A Paris-Burgundy
+    Orders are returned as `order_types.Order` records,
+    str(order) gives the familiar text form
+    (order_types.render_order(order, board) on other maps):
+    Hold: F Lon Holds
+    Move: A Par-Bur
         (Army Paris move to Burgundy)
     Support: A Par S A Mar-Bur
         (Army Paris support army Marseille to Burgundy)
     Convoy: F Bla C A Ank-Sev 
         (Fleet Black Sea convoy army Ankara to Sevastopol)
+    Retreat: F Nth R Nwy
+    Disband: A Bur Disband
+    Build: A Par Build
+
+    Province names are those of the unit's board, the standard map
+    unless another board index is given.
     """
-    def __init__(self, home_power, current_province, dislodged=False):
-        self.home_power = home_power
-        self.current_province = current_province
+    __slots__ = ("home_power", "location", "dislodged", "board")
+    # constant per unit class
+    type = None
+    allowed_province_types = ()
+
+    def __init__(self, home_power, current_province, dislodged=False,
+                 board=None):
+        self.home_power = sys.intern(home_power)
+        self.board = board or standard_board()
+        # location id on the unit's board, see board_index.py
+        self.location = self.board.location_ids[current_province]
         self.dislodged = dislodged
+
+    @property
+    def current_province(self):
+        return self.board.location_names[self.location]
+
+    @current_province.setter
+    def current_province(self, province):
+        self.location = self.board.location_ids[province]
+
+    def copy(self, location=None, dislodged=None):
+        """
+        Cheap copy (no __init__), optionally moved or (un)dislodged.
+        """
+        unit = self.__class__.__new__(self.__class__)
+        unit.home_power = self.home_power
+        unit.location = self.location if location is None else location
+        unit.dislodged = self.dislodged if dislodged is None else dislodged
+        unit.board = self.board
+        return unit
+
+    __copy__ = copy
     
     def __repr__(self):
         return f"Unit at {self.current_province}"
 
     def to_output(self):
-        return {"type":self.type, 
-                "home_power":self.home_power,
-                "current_province": self.current_province}
-
-    def base_order(order):
-        @functools.wraps(order)
-        def wrapper(*args, **kwargs):
-            self = args[0]
-            order_prefix = f"{self.type} {self.current_province}"
-            return order_prefix + order(*args)
-        return wrapper
-
-    @base_order
+        output = {"type":self.type, 
+                  "home_power":self.home_power,
+                  "current_province": self.current_province}
+        if self.dislodged:
+            output["dislodged"] = True
+        return output
+
     def hold(self):
-        order_string = " Holds"
-        return order_string
+        return Order(OrderKind.HOLD, self.type, self.location,
+                     power=self.home_power)
 
-    @base_order
     def move(self, to_province, retreat=False):
         # retreat is a special case of move
-        order_string = f"-{to_province}"
-        return order_string
+        return Order(OrderKind.RETREAT if retreat else OrderKind.MOVE,
+                     self.type, self.location,
+                     self.board.location_ids[to_province],
+                     power=self.home_power)
+
+    def disband(self):
+        return Order(OrderKind.DISBAND, self.type, self.location,
+                     power=self.home_power)
+
+    def build(self):
+        # the unit to build, at its home centre
+        return Order(OrderKind.BUILD, self.type, self.location,
+                     power=self.home_power)
 
-    @base_order
     def support(self, order):
-        # some sort of wrapper for hold and move orders
-        order_to_support = order
-        if "Holds" in order_to_support:
-            order_string = f" S " + order_to_support.split(" Holds")[0]
-        else:
-            order_string = f" S " + order_to_support
-        return order_string
-
-    @base_order
+        # support a hold or move order of another unit
+        if isinstance(order, str):
+            order = parse_order(order, self.board)
+        return Order(OrderKind.SUPPORT, self.type, self.location,
+                     order.target if order.kind == OrderKind.MOVE else -1,
+                     order.location, order.unit_type, self.home_power)
+
     def convoy(self, movement):
-        order_string = f" C " + movement
-        return order_string
+        if isinstance(movement, str):
+            movement = parse_order(movement, self.board)
+        return Order(OrderKind.CONVOY, self.type, self.location,
+                     movement.target, movement.location, movement.unit_type,
+                     self.home_power)
 
 class Army(Unit):
-    def __init__(self, home_power, current_province):
-        Unit.__init__(self, home_power, current_province)
-        self.type = "A"
-        self.allowed_province_types = ["inland", "coastal"]
-    
+    __slots__ = ()
+    type = "A"
+    allowed_province_types = ("inland", "coastal")
+
+    def __init__(self, home_power, current_province, dislodged=False,
+                 board=None):
+        Unit.__init__(self, home_power, current_province, dislodged, board)
+
     def __repr__(self):
         return f"Army at {self.current_province}"
 
 class Fleet(Unit):
-    def __init__(self, home_power, current_province, coast=None):
-        Unit.__init__(self, home_power, current_province)
-        self.type = "F"
-        # self.coast = coast
-        if coast == "south":
-            self.current_province = current_province + "_SC"
-        elif coast == "north":
-            self.current_province = current_province + "_NC"
-        else:
-            pass
-        self.allowed_province_types = ["water", "coastal"]
-    
+    __slots__ = ()
+    type = "F"
+    allowed_province_types = ("water", "coastal")
+
+    def __init__(self, home_power, current_province, coast=None, dislodged=False,
+                 board=None):
+        Unit.__init__(self, home_power, current_province, dislodged, board)
+        if coast is not None:
+            # move onto the coast's own location, e.g. StP -> StP_SC
+            board = self.board
+            for location in board.province_locations[self.location]:
+                if board.location_coast[location] == coast:
+                    self.location = location
+                    break
+            else:
+                raise KeyError(f"{current_province} has no {coast} coast")
+
     def __repr__(self):
         return f"Fleet at {self.current_province}"
     
-def unit_from_gamestate(unit_dict):
+def all_units(units):
+    """
+    Every unit of {power: [Unit]} in one list. GameStateFromInputs
+    may already hold a list, which is returned as it is.
+    """
+    if isinstance(units, dict):
+        return [unit for power_units in units.values() for unit in power_units]
+    return units
+
+def unit_from_ids(unit_type, home_power, location, board=None):
+    """
+    Unit from a location id of `board` (e.g. the unit of a build order).
+    """
+    unit_class = Fleet if unit_type == "F" else Army
+    unit = unit_class.__new__(unit_class)
+    unit.home_power = sys.intern(home_power)
+    unit.location = location
+    unit.dislodged = False
+    unit.board = board or standard_board()
+    return unit
+
+def unit_from_gamestate(unit_dict, board=None):
+    unit = _unit_from_output(unit_dict, board)
+    unit.dislodged = unit_dict.get("dislodged", False)
+    return unit
+
+def _unit_from_output(unit_dict, board):
     if unit_dict["type"] == "A":
-        return Army(unit_dict["home_power"], unit_dict["current_province"])
+        return Army(unit_dict["home_power"], unit_dict["current_province"],
+                    board=board)
     if unit_dict["type"] == "F":
         province = unit_dict["current_province"].split(" ")
         if len(province) == 2:
@@ -104,5 +183,7 @@ def unit_from_gamestate(unit_dict):
                 coast = "north"
             else:
                 coast = None
-            return Fleet(unit_dict["home_power"], province[0], coast=coast)
-        return Fleet(unit_dict["home_power"], unit_dict["current_province"])
\ No newline at end of file
+            return Fleet(unit_dict["home_power"], province[0], coast=coast,
+                         board=board)
+        return Fleet(unit_dict["home_power"], unit_dict["current_province"],
+                     board=board)
\ No newline at end of file
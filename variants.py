@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+
+"""
+Map variants described in JSON.
+
+A variant is a file variants/<name>.json:
+
+    {
+      "name": "standard",
+      "provinces": {"Boh": {"long_name": "Bohemia", "type": "inland",
+                            "home_power": "Austria", "supply_centre": false},
+                    "Spa": {..., "split_coast": true}, ...},
+      "borders": [["Boh", "Mun"],
+                  ["Edi", "Lvp", {"land_only": true}],
+                  ["Gas", "Spa", {"coast": "north"}], ...],
+      "starting_units": [["Austria", "A", "Vie"],
+                         ["Russia", "F", "StP_SC"], ...]
+    }
+
+Province and border attributes are those of board_data.py, starting
+units are (power, unit type, location name). The first time a variant
+is loaded its description is checked and compiled into a BoardIndex,
+which is pickled under CACHE_DIR keyed by the sha1 of the file; later
+processes load the pickle instead of building the index again. Within
+a process each variant is loaded once and re-checked cheaply (size and
+modification time) on each load, as in map_cache.py.
+
+    variant = load_variant("standard")
+    variant.board, variant.initial_units()
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+from board_index import CACHE_DIR, COAST_SUFFIXES, PROVINCE_TYPES, BoardIndex
+from units import unit_from_ids
+
+VARIANT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "variants")
+# variant name -> description file kept outside VARIANT_DIR
+VARIANT_FILES = {}
+# bump when BoardIndex changes, older pickles are then ignored
+COMPILED_VERSION = 1
+
+_variants = {}
+_lock = threading.Lock()
+
+
+class Variant:
+    """
+    A checked variant description and its compiled board.
+    """
+    __slots__ = ("name", "provinces", "borders", "starting_units", "board")
+
+    def __init__(self, name, provinces, borders, starting_units, board):
+        self.name = name
+        self.provinces = provinces
+        self.borders = borders
+        self.starting_units = starting_units
+        self.board = board
+
+    def __repr__(self):
+        return f"Variant({self.name!r}, {self.board!r})"
+
+    def graph(self):
+        """
+        networkx graph of the map, as board_data.make_graph().
+        """
+        import networkx as nx
+
+        G = nx.Graph()
+        G.add_nodes_from(self.provinces.items())
+        G.add_edges_from(self.borders)
+        return G
+
+    def initial_units(self):
+        """
+        {power: [Unit]} at the start of a game.
+        """
+        location_ids = self.board.location_ids
+        units = {}
+        for power, unit_type, location in self.starting_units:
+            units.setdefault(power, []).append(
+                unit_from_ids(unit_type, power, location_ids[location],
+                              self.board))
+        return units
+
+
+def variant_file(name, directory=None):
+    if directory is None and name in VARIANT_FILES:
+        return VARIANT_FILES[name]
+    return os.path.join(directory or VARIANT_DIR, f"{name}.json")
+
+
+def read_description(data):
+    """
+    Check a parsed description and return (provinces, borders,
+    starting_units) with every border as (a, b, attrs).
+    Raises ValueError on the first problem found.
+    """
+    provinces = data.get("provinces")
+    if not isinstance(provinces, dict) or not provinces:
+        raise ValueError("A variant needs provinces")
+    for name, attrs in provinces.items():
+        for key in ("type", "home_power", "supply_centre"):
+            if key not in attrs:
+                raise ValueError(f"Province {name} has no {key}")
+        if attrs["type"] not in PROVINCE_TYPES:
+            raise ValueError(f"Province {name} has unknown type {attrs['type']!r}")
+    borders = []
+    for border in data.get("borders", ()):
+        if len(border) not in (2, 3):
+            raise ValueError(f"Bad border {border!r}")
+        a, b = border[0], border[1]
+        attrs = border[2] if len(border) == 3 else {}
+        for province in (a, b):
+            if province not in provinces:
+                raise ValueError(f"Border {a}-{b} names unknown province {province}")
+        coast = attrs.get("coast")
+        if coast is not None:
+            coasts = (coast,) if isinstance(coast, str) else tuple(coast)
+            if not any(provinces[p].get("split_coast") for p in (a, b)):
+                raise ValueError(f"Border {a}-{b} has a coast but no split coast province")
+            for name in coasts:
+                if name not in COAST_SUFFIXES:
+                    raise ValueError(f"Border {a}-{b} has unknown coast {name!r}")
+        borders.append((a, b, attrs))
+    starting_units = []
+    for unit in data.get("starting_units", ()):
+        if len(unit) != 3 or unit[1] not in ("A", "F"):
+            raise ValueError(f"Bad starting unit {unit!r}")
+        starting_units.append(tuple(unit))
+    return provinces, borders, starting_units
+
+
+def _check_units(starting_units, board):
+    occupied = set()
+    for power, unit_type, location in starting_units:
+        if power not in board.powers:
+            raise ValueError(f"Unknown power {power}")
+        if location not in board.location_ids:
+            raise ValueError(f"Unknown starting location {location}")
+        location_id = board.location_ids[location]
+        moves = board.fleet_moves if unit_type == "F" else board.army_moves
+        if not moves[location_id]:
+            raise ValueError(f"{unit_type} {location} can't move anywhere")
+        province = board.location_province[location_id]
+        if province in occupied:
+            raise ValueError(f"Two starting units in {board.province_names[province]}")
+        occupied.add(province)
+
+
+def compile_variant(raw, name):
+    """
+    Build the Variant of a description from the bytes of its file.
+    """
+    data = json.loads(raw)
+    provinces, borders, starting_units = read_description(data)
+    board = BoardIndex(provinces, borders)
+    _check_units(starting_units, board)
+    return Variant(data.get("name", name), provinces, borders, starting_units,
+                   board)
+
+
+def compiled_file(name, file_hash, directory=None):
+    return os.path.join(directory or CACHE_DIR,
+                        f"variant_{name}_{file_hash[:16]}.pickle")
+
+
+def _load_compiled(path):
+    try:
+        with open(path, "rb") as f:
+            version, variant = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    return variant if version == COMPILED_VERSION else None
+
+
+def _save_compiled(path, variant):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # written under a temporary name so other processes never see
+    # a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump((COMPILED_VERSION, variant), f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_variant(name="standard", directory=None, cache_directory=None):
+    """
+    Return the Variant `name`, from the process cache, the compiled
+    cache or, failing both, compiled from its description.
+    """
+    path = variant_file(name, directory)
+    stat = os.stat(path)
+    stat = (stat.st_mtime_ns, stat.st_size)
+    cached = _variants.get(path)
+    if cached is not None and cached[0] == stat:
+        return cached[2]
+    with _lock:
+        with open(path, "rb") as f:
+            raw = f.read()
+        file_hash = hashlib.sha1(raw).hexdigest()
+        if cached is not None and cached[1] == file_hash:
+            # touched but unchanged
+            variant = cached[2]
+        else:
+            compiled = compiled_file(name, file_hash, cache_directory)
+            variant = _load_compiled(compiled)
+            if variant is None:
+                variant = compile_variant(raw, name)
+                _save_compiled(compiled, variant)
+        _variants[path] = (stat, file_hash, variant)
+    return variant
+
+
+def clear_cache():
+    with _lock:
+        _variants.clear()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""
+Zobrist hashing of positions.
+
+Every (location, unit type, power) a unit can be in, every dislodged
+unit's location and every (supply centre, owner) gets a random 64-bit
+key. The hash of a position is the xor of the keys of what is on the
+board, so moving a unit or changing a centre's owner updates it with
+two xors instead of rehashing the whole position:
+
+    hash ^= keys.unit(old_unit) ^ keys.unit(new_unit)
+
+The keys are drawn from a generator seeded with the board
+fingerprint, so hashes are the same in every process and can be
+stored or shared as transposition table keys.
+"""
+import random
+import threading
+
+_keys = {}
+_lock = threading.Lock()
+
+
+class ZobristKeys:
+    """
+    Random keys of one board, see the module docstring.
+    """
+    __slots__ = ("board", "_power_ids", "_units", "_dislodged", "_centres")
+
+    def __init__(self, board):
+        self.board = board
+        rng = random.Random(board.fingerprint)
+        n_powers = len(board.powers)
+        self._power_ids = {power: i for i, power in enumerate(board.powers)}
+        # one key per (location, unit type, power), armies first
+        self._units = tuple(rng.getrandbits(64)
+                            for _ in range(len(board.location_names) * 2 * n_powers))
+        self._dislodged = tuple(rng.getrandbits(64)
+                                for _ in board.location_names)
+        self._centres = tuple(rng.getrandbits(64)
+                              for _ in range(len(board.province_names) * n_powers))
+
+    def unit(self, unit):
+        n_powers = len(self._power_ids)
+        key = self._units[(unit.location * 2 + (unit.type == "F")) * n_powers +
+                          self._power_ids[unit.home_power]]
+        if unit.dislodged:
+            key ^= self._dislodged[unit.location]
+        return key
+
+    def centre(self, province, power):
+        if power is None:
+            return 0
+        return self._centres[province * len(self._power_ids) + self._power_ids[power]]
+
+    def position(self, units, centre_owners):
+        """
+        Hash of a whole position from scratch.
+        `units` is an iterable of Unit, `centre_owners` {province id: power}.
+        """
+        key = 0
+        for unit in units:
+            key ^= self.unit(unit)
+        for province, power in centre_owners.items():
+            key ^= self.centre(province, power)
+        return key
+
+
+def zobrist_keys(board):
+    """
+    The shared ZobristKeys of a board.
+    """
+    keys = _keys.get(board.fingerprint)
+    if keys is None:
+        with _lock:
+            keys = _keys.setdefault(board.fingerprint, ZobristKeys(board))
+    return keys